@@ -2,11 +2,18 @@
 Configuration settings for the web scraper.
 """
 
+import re
+
 # Scraping settings
 SCRAPING_DELAY = 1.0  # Delay between requests in seconds
 MAX_RETRIES = 3  # Maximum number of retry attempts
+MAX_BACKOFF = 30  # Upper bound on retry backoff in seconds
+TOKEN_BUCKET_BURST = 3  # Requests a host may receive back-to-back before throttling
 MAX_PAGES = 1  # Maximum number of pages to process for pagination (link depth limit)
 REQUEST_TIMEOUT = 30  # Request timeout in seconds
+MAX_PAGE_BYTES = 5_000_000  # Hard cap on HTML bytes buffered per page
+BROWSER_POOL_RECYCLE_AFTER = 50  # Contexts served before the shared browser is relaunched
+LISTING_CONCURRENCY = 5  # Posts scraped in parallel when expanding a listing page
 
 # Content filtering
 MIN_CONTENT_LENGTH = 50  # Minimum content length to consider valid
@@ -32,6 +39,22 @@ CONTENT_TYPE_PATTERNS = {
     'other': []
 }
 
+# URL patterns that mark a listing page rather than an individual post
+LISTING_URL_PATTERNS = [
+    '/blog',
+    '/posts',
+    '/articles',
+    '/topics',
+    '/learn',
+    '/category',
+    '/tag',
+    '/archive',
+    '/search'
+]
+
+# Compiled alternation so listing detection is a single C-level scan
+LISTING_URL_RE = re.compile('|'.join(re.escape(p) for p in LISTING_URL_PATTERNS))
+
 # URL patterns to skip
 SKIP_URL_PATTERNS = [
     '/tag/',
@@ -51,6 +74,20 @@ SKIP_URL_PATTERNS = [
     '.js'
 ]
 
+# Single compiled alternation over SKIP_URL_PATTERNS so callers can test a URL
+# with one C-level scan instead of looping over every pattern in Python
+SKIP_URL_RE = re.compile('|'.join(re.escape(p) for p in SKIP_URL_PATTERNS))
+
+# Every content type's patterns fused into a single alternation with named
+# groups, so detection can find all pattern hits in one scan of the haystack
+# instead of one scan per type. CONTENT_TYPE_PRIORITY preserves the dict
+# order, which decides ties when several types match.
+CONTENT_TYPE_PRIORITY = [ct for ct, ps in CONTENT_TYPE_PATTERNS.items() if ps]
+CONTENT_TYPE_FUSED_RE = re.compile('|'.join(
+    '(?P<%s>%s)' % (ct, '|'.join(re.escape(p) for p in CONTENT_TYPE_PATTERNS[ct]))
+    for ct in CONTENT_TYPE_PRIORITY
+))
+
 # Content selectors for different types of content
 CONTENT_SELECTORS = [
     'main',
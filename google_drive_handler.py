@@ -5,34 +5,58 @@ Handles both folder and file links, including download confirmation for large fi
 
 import re
 import asyncio
+import logging
 import aiohttp
 from typing import List, Optional
 from urllib.parse import urlparse, parse_qs
 from bs4 import BeautifulSoup
-import PyPDF2
-from io import BytesIO
+from http_client import create_session
+
+logger = logging.getLogger(__name__)
 
 CONFIRM_TOKEN_RE = re.compile(r"confirm=([0-9A-Za-z_]+)")
+# File/folder IDs as they appear in Drive hrefs and share URLs; the fused
+# alternation covers /file/d/<id>, /open?id=, /uc?id= and
+# /uc?export=download&id= in a single scan
+FILE_ID_HREF_RE = re.compile(r'/file/d/([a-zA-Z0-9_-]+)')
+FILE_ID_RE = re.compile(r'(?:/file/d/|[?&]id=)([a-zA-Z0-9_-]+)')
+FOLDER_ID_RE = re.compile(r'/folders/([a-zA-Z0-9_-]+)')
+# The warning page embeds the token as <input name="confirm" value="...">;
+# match it (in either attribute order) without building a full DOM
+CONFIRM_INPUT_RE = re.compile(
+    r'<input[^>]+name=["\']confirm["\'][^>]+value=["\']([^"\']+)["\']', re.I)
+CONFIRM_INPUT_REVERSED_RE = re.compile(
+    r'<input[^>]+value=["\']([^"\']+)["\'][^>]+name=["\']confirm["\']', re.I)
 
 class GoogleDriveHandler:
     """Handler for Google Drive links to extract and download PDF URLs."""
     
-    def __init__(self):
-        self.session = None
-    
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        self.session = session
+        self._owns_session = False
+
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = aiohttp.ClientSession()
+        if self.session is None:
+            self.session = create_session()
+            self._owns_session = True
         return self
-    
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
+            self.session = None
     
-    def is_google_drive_url(self, url: str) -> bool:
+    @staticmethod
+    def is_google_drive_url(url: str) -> bool:
         """Check if the URL is a Google Drive link."""
-        return 'drive.google.com' in url.lower()
+        return GoogleDriveHandler._is_google_drive_url(url.lower())
+
+    @staticmethod
+    def _is_google_drive_url(url_lower: str) -> bool:
+        """Variant that assumes the URL is already lowercased."""
+        return 'drive.google.com' in url_lower
     
     async def extract_pdf_urls(self, url: str) -> List[str]:
         """Extract direct PDF URLs from Google Drive links."""
@@ -63,18 +87,26 @@ class GoogleDriveHandler:
                 return []
                 
         except Exception as e:
-            print(f"Error processing Google Drive URL {url}: {e}")
+            logger.error("Error processing Google Drive URL %s: %s", url, e)
             return []
     
     async def _extract_from_folder(self, folder_url: str) -> List[str]:
         """Extract PDF URLs from a Google Drive folder."""
         try:
-            print(f"Processing Google Drive folder: {folder_url}")
+            logger.info("Processing Google Drive folder: %s", folder_url)
             async with self.session.get(folder_url, timeout=30) as response:
                 if response.status != 200:
-                    print(f"Failed to fetch folder page: {response.status}")
+                    logger.warning("Failed to fetch folder page: %s", response.status)
                     return []
-                html_content = await response.text()
+                # Stream the body in chunks with a hard cap so a pathological
+                # page cannot buffer unbounded memory; 4 MB is far beyond any
+                # real folder listing
+                buf = bytearray()
+                async for chunk in response.content.iter_chunked(65536):
+                    buf.extend(chunk)
+                    if len(buf) > 4_000_000:
+                        break
+                html_content = buf.decode('utf-8', 'ignore')
             
             # Extract file IDs and names
             files = self._parse_folder_html_for_files(html_content)
@@ -87,124 +119,138 @@ class GoogleDriveHandler:
                     unique_files.append((file_id, file_name))
                     seen_ids.add(file_id)
             
-            print(f"Found {len(unique_files)} files in folder:")
+            logger.debug("Found %d files in folder", len(unique_files))
             for file_id, file_name in unique_files:
-                print(f"  - {file_name} (ID: {file_id})")
+                logger.debug("  - %s (ID: %s)", file_name, file_id)
             
-            # Filter for PDF files based on file extension
+            # Filter for PDF files based on file extension; files without a
+            # resolvable name get probed over the network instead
             pdf_urls = []
+            unverified_urls = []
             for file_id, file_name in unique_files:
+                url = self._make_download_url(file_id)
                 if file_name.lower().endswith('.pdf'):
-                    url = self._make_download_url(file_id)
                     pdf_urls.append(url)
-                    print(f"  ✓ Added PDF: {file_name}")
+                    logger.debug("Added PDF: %s", file_name)
+                elif not file_name:
+                    unverified_urls.append(url)
                 else:
-                    print(f"  ✗ Skipped non-PDF: {file_name}")
-            
-            print(f"Found {len(pdf_urls)} PDF files in folder")
+                    logger.debug("Skipped non-PDF: %s", file_name)
+
+            if unverified_urls:
+                verdicts = await self.classify_many(unverified_urls)
+                pdf_urls.extend(url for url in unverified_urls if verdicts.get(url))
+
+            logger.info("Found %d PDF files in folder", len(pdf_urls))
             return pdf_urls
             
         except Exception as e:
-            print(f"Error extracting from folder {folder_url}: {e}")
+            logger.error("Error extracting from folder %s: %s", folder_url, e)
             return []
     
     def _parse_folder_html_for_file_ids(self, html_content: str) -> List[str]:
         """Find all file IDs in the folder HTML."""
-        # Find all file IDs in the folder HTML
-        file_id_pattern = r'/file/d/([a-zA-Z0-9_-]+)'
-        return re.findall(file_id_pattern, html_content)
+        return FILE_ID_HREF_RE.findall(html_content)
     
     def _parse_folder_html_for_files(self, html_content: str) -> List[tuple]:
         """Extract file IDs and names from the folder HTML."""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Cheap single-pass regex scan first: if the page has no file links
+        # at all we never pay for a DOM build
+        file_ids = self._parse_folder_html_for_file_ids(html_content)
+        if not file_ids:
+            return []
+
+        # Build the DOM only because we want display names for filtering
+        # (lxml parses the large, minified folder HTML in C instead of the
+        # pure-Python html.parser)
+        soup = BeautifulSoup(html_content, 'lxml')
         files = []
-        
+
         # Look for file links in Google Drive interface
         # Google Drive typically uses this pattern for file links
-        file_links = soup.find_all('a', href=re.compile(r'/file/d/'))
-        
+        file_links = soup.find_all('a', href=FILE_ID_HREF_RE)
+
         for link in file_links:
             # Extract file ID from href
             href = link.get('href', '')
-            file_id_match = re.search(r'/file/d/([a-zA-Z0-9_-]+)', href)
+            file_id_match = FILE_ID_HREF_RE.search(href)
             if file_id_match:
                 file_id = file_id_match.group(1)
-                
+
                 # Try to extract file name from various possible locations
                 file_name = self._extract_file_name_from_link(link)
-                
+
                 if file_name:
                     files.append((file_id, file_name))
-        
-        # If we couldn't extract names from links, try alternative methods
-        if not files:
-            # Look for file names in the page content
-            files = self._extract_files_from_content(html_content)
-        
+
+        # Keep regex-discovered IDs whose names we could not resolve as
+        # unnamed candidates instead of dropping them
+        named_ids = {file_id for file_id, _ in files}
+        for file_id in dict.fromkeys(file_ids):
+            if file_id not in named_ids:
+                files.append((file_id, ""))
+
         return files
     
     def _extract_file_name_from_link(self, link) -> str:
         """Extract file name from a Google Drive file link."""
-        # Try different attributes where Google Drive might store the file name
-        name_attributes = [
-            'title',
-            'aria-label',
-            'data-tooltip',
-            'data-title'
-        ]
-        
-        for attr in name_attributes:
-            name = link.get(attr, '')
-            if name and name.strip():
-                return name.strip()
-        
-        # Try to get text content
-        text = link.get_text(strip=True)
-        if text and len(text) > 0:
-            return text
-        
-        return ""
-    
-    def _extract_files_from_content(self, html_content: str) -> List[tuple]:
-        """Extract file information from page content as fallback."""
-        files = []
-        
-        # Look for patterns that might contain file information
-        # This is a fallback method when the standard link parsing doesn't work
-        
-        # Pattern for file IDs
-        file_id_pattern = r'/file/d/([a-zA-Z0-9_-]+)'
-        file_ids = re.findall(file_id_pattern, html_content)
-        
-        # For now, we'll use the file IDs we found and assume they're PDFs
-        # In a more sophisticated implementation, we could look for file names
-        # in the surrounding HTML context
-        for file_id in file_ids:
-            files.append((file_id, f"file_{file_id}.pdf"))
-        
-        return files
-    
+        # Attributes where Google Drive might store the file name, in
+        # preference order; a single or-chain avoids the loop entirely
+        name = (link.get('title')
+                or link.get('aria-label')
+                or link.get('data-tooltip')
+                or link.get('data-title')
+                or link.get_text(strip=True)
+                or '')
+        return name.strip()
+
     def _extract_file_id(self, url: str) -> Optional[str]:
         """Extract file ID from Google Drive URL."""
-        # Pattern for file ID in various Google Drive URL formats
-        patterns = [
-            r'/file/d/([a-zA-Z0-9_-]+)',
-            r'/open\?id=([a-zA-Z0-9_-]+)',
-            r'/uc\?id=([a-zA-Z0-9_-]+)',
-            r'/uc\?export=download&id=([a-zA-Z0-9_-]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
+        match = FILE_ID_RE.search(url)
+        return match.group(1) if match else None
     
     def _make_download_url(self, file_id: str) -> str:
         """Create a direct download URL for a file."""
         return f"https://drive.google.com/uc?export=download&id={file_id}"
     
+    async def classify_many(self, urls: List[str], max_concurrent: int = 10) -> dict:
+        """Classify download URLs as PDF or not, returning {url: is_pdf}.
+
+        A cheap batched HEAD pass settles most URLs from the content type
+        alone; only the ambiguous remainder (octet-stream, confirm pages,
+        failed HEADs) fans out to the full streamed probe, also in parallel.
+        """
+        sem = asyncio.Semaphore(max_concurrent)
+
+        async def _head(url: str):
+            async with sem:
+                try:
+                    async with self.session.head(url, timeout=30, allow_redirects=True) as resp:
+                        return url, resp.status, resp.headers.get('content-type', '').lower()
+                except Exception:
+                    return url, None, ''
+
+        results = {}
+        ambiguous = []
+        for url, status, ctype in await asyncio.gather(*(_head(u) for u in urls)):
+            if status == 200 and 'pdf' in ctype:
+                results[url] = True
+            elif status == 200 and ctype and not any(
+                    t in ctype for t in ('octet-stream', 'html', 'text')):
+                results[url] = False
+            else:
+                ambiguous.append(url)
+
+        async def _probe(url: str):
+            async with sem:
+                is_pdf, _ = await self._is_pdf_file_debug(url)
+                return url, is_pdf
+
+        for url, is_pdf in await asyncio.gather(*(_probe(u) for u in ambiguous)):
+            results[url] = is_pdf
+
+        return results
+
     async def _is_pdf_file_debug(self, url: str):
         """Check if the file at the given URL is a PDF, returning (is_pdf, content_type)."""
         try:
@@ -215,15 +261,11 @@ class GoogleDriveHandler:
                         return True, ctype
                     # Accept application/octet-stream as a possible PDF
                     if ctype == 'application/octet-stream':
-                        # Try to read a small chunk and check if it's a PDF
-                        content = await resp.read()
-                        try:
-                            PyPDF2.PdfReader(BytesIO(content))
-                            return True, ctype
-                        except Exception as e:
-                            print(f"    Not a valid PDF (PyPDF2 error): {e}")
-                            return False, ctype
-                    if 'text' in ctype or 'html' in ctype or ctype == '' or ctype == 'application/octet-stream':
+                        # Check the %PDF- magic number on the first 5 bytes
+                        # instead of buffering and parsing the whole file
+                        head = await resp.content.read(5)
+                        return head.startswith(b'%PDF-'), ctype
+                    if 'text' in ctype or 'html' in ctype or ctype == '':
                         text = await resp.text(errors='ignore')
                         confirm_token = self._extract_confirm_token(text)
                         if confirm_token:
@@ -233,33 +275,23 @@ class GoogleDriveHandler:
                                 if 'pdf' in ctype2:
                                     return True, ctype2
                                 if ctype2 == 'application/octet-stream':
-                                    content2 = await resp2.read()
-                                    try:
-                                        PyPDF2.PdfReader(BytesIO(content2))
-                                        return True, ctype2
-                                    except Exception as e:
-                                        print(f"    Not a valid PDF (PyPDF2 error): {e}")
-                                        return False, ctype2
+                                    head2 = await resp2.content.read(5)
+                                    return head2.startswith(b'%PDF-'), ctype2
                 return False, resp.headers.get('content-type', '').lower()
         except Exception as e:
-            print(f"Error checking PDF file at {url}: {e}")
+            logger.debug("Error checking PDF file at %s: %s", url, e)
             return False, None
     
     def _extract_confirm_token(self, html: str) -> Optional[str]:
         """Extract confirm token from HTML content."""
         # Google sometimes puts the confirm token in a form or in the URL
-        match = CONFIRM_TOKEN_RE.search(html)
-        if match:
-            return match.group(1)
-        # Try to find confirm token in download warning page
-        soup = BeautifulSoup(html, 'html.parser')
-        for input_tag in soup.find_all('input'):
-            if input_tag.get('name') == 'confirm':
-                return input_tag.get('value')
+        for pattern in (CONFIRM_TOKEN_RE, CONFIRM_INPUT_RE, CONFIRM_INPUT_REVERSED_RE):
+            match = pattern.search(html)
+            if match:
+                return match.group(1)
         return None
     
     def _extract_folder_id(self, url: str) -> Optional[str]:
         """Extract folder ID from Google Drive URL."""
-        pattern = r'/folders/([a-zA-Z0-9_-]+)'
-        match = re.search(pattern, url)
+        match = FOLDER_ID_RE.search(url)
         return match.group(1) if match else None 
\ No newline at end of file
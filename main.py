@@ -6,117 +6,196 @@ Automatically detects content type and applies the most appropriate scraping str
 """
 
 import asyncio
-import json
+import functools
+
+try:
+    # libuv-backed event loop; a large win for aiohttp-heavy workloads
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+
+import logging
+import logging.handlers
+import os
+import queue
+import re
 import sys
-from typing import List, Dict, Any
-from url_processor import URLProcessor
+from collections import Counter
+from itertools import chain
+from urllib.parse import urlsplit
+from typing import AsyncIterator, List, Dict, Any
+from url_processor import URLProcessor, canonicalize_url
 from output_formatter import OutputFormatter
 from scraper import WebScraper
 from pdf_scraper import PDFScraper
 from google_drive_handler import GoogleDriveHandler
+from http_client import create_session
+
+logger = logging.getLogger(__name__)
+
+
+def _setup_logging() -> logging.handlers.QueueListener:
+    """Route all logging through a queue drained on a background thread.
+
+    Workers log with a non-blocking queue put instead of a synchronous
+    stderr write, so progress output never serializes the coroutines.
+    """
+    log_queue = queue.Queue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    listener.start()
+    return listener
+
+
+# URL patterns that indicate an individual blog post / static page
+SIMPLE_PAGE_RE = re.compile('|'.join(re.escape(p) for p in [
+    '/blog/', '/post/', '/article/',
+    '/202', '/2023', '/2024', '/2025',
+    '/guides/', '/questions/', '/mocks/'
+]))
+
+
+def _normalize_url(url: str) -> str:
+    """Build a canonical key for deduplication."""
+    # Delegates to the shared canonicalizer so fragments, tracking params
+    # and port/slash variants all collapse to one key
+    return canonicalize_url(url)
 
 
 class IntelligentScraper:
     """Intelligent scraper that automatically detects content type and applies the best strategy."""
     
     def __init__(self):
+        self._session = None
+        self._sem = asyncio.Semaphore(int(os.getenv("SCRAPER_CONCURRENCY", "16")))
+        # Hosts where plain HTML scraping came back empty; future pages on
+        # these hosts skip straight to JavaScript rendering
+        self._js_required_hosts = set()
         self.web_scraper = WebScraper()
         self.pdf_scraper = PDFScraper()
         self.google_drive_handler = GoogleDriveHandler()
-    
+
     async def __aenter__(self):
         """Async context manager entry."""
+        # One shared session so all handlers reuse the same connection pool
+        self._session = create_session()
+        self.web_scraper.session = self._session
+        self.pdf_scraper.session = self._session
+        self.google_drive_handler.session = self._session
         await self.web_scraper.__aenter__()
         await self.pdf_scraper.__aenter__()
         await self.google_drive_handler.__aenter__()
         return self
-    
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
         await self.web_scraper.__aexit__(exc_type, exc_val, exc_tb)
         await self.pdf_scraper.__aexit__(exc_type, exc_val, exc_tb)
         await self.google_drive_handler.__aexit__(exc_type, exc_val, exc_tb)
+        if self._session:
+            await self._session.close()
+            self._session = None
     
     def detect_content_type(self, url: str) -> str:
         """Detect the type of content at the URL."""
-        url_lower = url.lower()
-        
+        return self._detect_content_type_cached(url.lower())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _detect_content_type_cached(url_lower: str) -> str:
+        """Classify an already-lowercased URL; memoized since URL processors
+        routinely expand one input into many duplicates."""
         # Step 1: Check if it's a Google Drive URL
-        if self.google_drive_handler.is_google_drive_url(url):
+        if GoogleDriveHandler._is_google_drive_url(url_lower):
             return "google_drive"
-        
+
         # Step 2: Check if it's a PDF
-        if self.pdf_scraper.is_pdf_url(url):
+        if PDFScraper._is_pdf_url(url_lower):
             return "pdf"
-        
+
         # Step 3: Check if it's an individual blog post (should use simple scraping)
-        # Look for patterns that indicate individual blog posts
-        if any(pattern in url_lower for pattern in [
-            '/blog/', '/post/', '/article/', 
-            '/202', '/2023', '/2024', '/2025',
-            '/guides/', '/questions/', '/mocks/'
-        ]):
+        if SIMPLE_PAGE_RE.search(url_lower):
             return "simple_website"
-        
+
         # Step 4: Check if it's a listing page (generic detection)
-        if self.web_scraper._is_listing_page(url):
+        if WebScraper._is_listing_page(url_lower):
             return "complex_website"
-        
+
         # Default: treat as simple website
         return "simple_website"
     
     async def scrape_url(self, url: str, user_id: str) -> List[Dict[str, Any]]:
         """Scrape a URL using the most appropriate strategy."""
         content_type = self.detect_content_type(url)
-        print(f"🔍 Detected content type: {content_type} for {url}")
+        logger.info("🔍 Detected content type: %s for %s", content_type, url)
         
         try:
             if content_type == "google_drive":
-                print(f"📁 Processing Google Drive URL...")
+                logger.info("📁 Processing Google Drive URL...")
                 return await self._scrape_google_drive(url, user_id)
             
             elif content_type == "pdf":
-                print(f"📄 Processing PDF...")
+                logger.info("📄 Processing PDF...")
                 return await self.pdf_scraper.scrape_pdf(url, user_id)
             
             elif content_type == "complex_website":
-                print(f"🎯 Processing complex website (with card clicking)...")
+                logger.info("🎯 Processing complex website (with card clicking)...")
                 return await self._scrape_complex_website(url, user_id)
             
             else:
                 # For simple websites, use simple scraping directly
-                print(f"🌐 Processing simple website...")
+                logger.info("🌐 Processing simple website...")
                 return await self._scrape_simple_website(url, user_id)
                 
         except Exception as e:
-            print(f"❌ Error scraping {url}: {e}")
+            logger.error("❌ Error scraping %s: %s", url, e)
             return []
     
     async def _scrape_google_drive(self, url: str, user_id: str) -> List[Dict[str, Any]]:
         """Handle Google Drive URLs."""
         pdf_urls = await self.google_drive_handler.extract_pdf_urls(url)
-        
-        all_items = []
-        for pdf_url in pdf_urls:
-            if pdf_url != url:  # Skip if it's the same URL
-                items = await self.pdf_scraper.scrape_pdf(pdf_url, user_id)
-                all_items.extend(items)
-        
-        return all_items
+
+        # Download all PDFs in the folder concurrently over the shared
+        # session. No self._sem here: the caller already holds a slot for
+        # this URL, and re-acquiring it from inside would deadlock once
+        # every slot is an outer task waiting on its own fan-out. The PDF
+        # scraper's download semaphore bounds the actual transfers.
+        results = await asyncio.gather(
+            *(self.pdf_scraper.scrape_pdf(pdf_url, user_id)
+              for pdf_url in pdf_urls if pdf_url != url),
+            return_exceptions=True
+        )
+        return list(chain.from_iterable(r for r in results if not isinstance(r, BaseException)))
     
     async def _scrape_simple_website(self, url: str, user_id: str) -> List[Dict[str, Any]]:
         """Handle simple websites with basic HTML scraping."""
         try:
-            # Always use simple HTML scraping for simple websites
-            content = await self.web_scraper._scrape_html(url)
-            
-            if not content or not content.get('content'):
-                print(f"⚠️ No content found with simple scraping, trying JavaScript...")
-                # Fallback to JavaScript if simple scraping fails
+            host = urlsplit(url).netloc
+
+            if host in self._js_required_hosts:
+                # HTML scraping already failed for this host; don't pay for
+                # the doomed round-trip again
                 content = await self.web_scraper._scrape_javascript(url)
-            
+            else:
+                # Use simple HTML scraping first for simple websites
+                content, html = await self.web_scraper._scrape_html(url)
+
+                if ((not content or not content.get('content'))
+                        and self.web_scraper._needs_js(html)):
+                    logger.info("⚠️ No content found with simple scraping, trying JavaScript...")
+                    # Fallback to JavaScript if simple scraping fails, and
+                    # remember the host so its other pages go straight to JS
+                    self._js_required_hosts.add(host)
+                    content = await self.web_scraper._scrape_javascript(url)
+
             if not content or not content.get('content'):
-                print(f"❌ No content found for {url}")
+                logger.info("❌ No content found for %s", url)
                 return []
             
             # Add metadata
@@ -128,7 +207,7 @@ class IntelligentScraper:
             return [content]
             
         except Exception as e:
-            print(f"❌ Error scraping simple website {url}: {e}")
+            logger.error("❌ Error scraping simple website %s: %s", url, e)
             return []
     
     def _determine_content_type(self, url: str, content: Dict[str, Any]) -> str:
@@ -151,20 +230,31 @@ class IntelligentScraper:
         """Handle complex websites with card clicking logic."""
         return await self.web_scraper.scrape_listing_page(url, user_id)
     
+    async def iter_scraped(self, urls: List[str], user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Scrape URLs concurrently and yield items as each URL completes."""
+        # Canonical-key dedupe: repeated spellings of one page (tracking
+        # params, fragments, trailing slash) cost a single fetch
+        urls = list({canonicalize_url(u): u for u in urls}.values())
+
+        async def _one(i: int, url: str) -> List[Dict[str, Any]]:
+            async with self._sem:
+                logger.info("📋 Processing %d/%d: %s", i, len(urls), url)
+                try:
+                    items = await self.scrape_url(url, user_id)
+                    logger.info("✅ Found %d items from %s", len(items), url)
+                    return items
+                except Exception as e:
+                    logger.error("❌ Error processing %s: %s", url, e)
+                    return []
+
+        tasks = [asyncio.ensure_future(_one(i, url)) for i, url in enumerate(urls, 1)]
+        for task in asyncio.as_completed(tasks):
+            for item in await task:
+                yield item
+
     async def scrape_multiple_urls(self, urls: List[str], user_id: str) -> List[Dict[str, Any]]:
-        """Scrape multiple URLs using intelligent detection."""
-        all_items = []
-        
-        for i, url in enumerate(urls, 1):
-            print(f"\n📋 Processing {i}/{len(urls)}: {url}")
-            try:
-                items = await self.scrape_url(url, user_id)
-                all_items.extend(items)
-                print(f"✅ Found {len(items)} items from {url}")
-            except Exception as e:
-                print(f"❌ Error processing {url}: {e}")
-        
-        return all_items
+        """Scrape multiple URLs and collect all items in memory."""
+        return [item async for item in self.iter_scraped(urls, user_id)]
 
 
 async def main():
@@ -182,7 +272,9 @@ async def main():
     team_id = sys.argv[1]
     user_id = sys.argv[2]
     urls = sys.argv[3:]
-    
+
+    log_listener = _setup_logging()
+
     print(f"🚀 Starting intelligent scrape for team: {team_id}, user: {user_id}")
     print(f"📊 URLs to process: {len(urls)}")
     
@@ -191,30 +283,88 @@ async def main():
     scraper = IntelligentScraper()
     formatter = OutputFormatter()
     
-    # Process URLs to get individual page URLs
-    all_page_urls = []
-    for url in urls:
-        print(f"🔗 Processing URL: {url}")
-        page_urls = await url_processor.process_url(url)
-        all_page_urls.extend(page_urls)
-        print(f"📄 Found {len(page_urls)} individual pages")
-    
-    print(f"📋 Total pages to scrape: {len(all_page_urls)}")
-    
-    # Scrape all pages using intelligent scraper
-    async with scraper:
-        scraped_items = await scraper.scrape_multiple_urls(all_page_urls, user_id)
-    
-    # Format output
-    output = formatter.format_output(team_id, scraped_items)
-    
-    # Save to file
+    # Producer/worker/writer pipeline over bounded queues: URL discovery,
+    # scraping and output streaming all overlap, and memory stays bounded
+    # regardless of how many pages the crawl expands into
     output_file = f"scraped_data_{team_id}_{user_id}.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
-    
+    content_types = Counter()
+    url_q = asyncio.Queue(maxsize=1000)
+    items_q = asyncio.Queue()
+    num_workers = int(os.getenv("SCRAPER_CONCURRENCY", "16"))
+
+    async def produce_urls():
+        """Feed discovered page URLs to the workers as each seed resolves."""
+        seen = set()
+        for url in urls:
+            logger.info("🔗 Processing URL: %s", url)
+            page_urls = await url_processor.process_url(url)
+            logger.info("📄 Found %d individual pages", len(page_urls))
+            for page_url in page_urls:
+                # Overlapping sources routinely discover the same pages
+                key = _normalize_url(page_url)
+                if key not in seen:
+                    seen.add(key)
+                    await url_q.put(page_url)
+
+    async def scrape_worker():
+        """Scrape queued pages and push their items to the writer."""
+        while True:
+            page_url = await url_q.get()
+            if page_url is None:
+                break
+            try:
+                logger.info("📋 Processing: %s", page_url)
+                items = await scraper.scrape_url(page_url, user_id)
+                logger.info("✅ Found %d items from %s", len(items), page_url)
+                for item in items:
+                    await items_q.put(item)
+            except Exception as e:
+                logger.error("❌ Error processing %s: %s", page_url, e)
+
+    async with scraper:
+        # 1 MB buffer batches the per-item writes into few syscalls
+        with open(output_file, 'wb', buffering=1 << 20) as f:
+            writer = formatter.stream_writer(team_id, f)
+
+            async def write_items():
+                """Single consumer that streams items to the output file."""
+                done = False
+                while not done:
+                    # Wait for one item, then greedily drain whatever else is
+                    # already queued so bursts are written in one batch
+                    # instead of a scheduler round-trip per item
+                    batch = [await items_q.get()]
+                    while len(batch) < 64:
+                        try:
+                            batch.append(items_q.get_nowait())
+                        except asyncio.QueueEmpty:
+                            break
+                    for item in batch:
+                        if item is None:
+                            done = True
+                            break
+                        formatted = writer.write(item)
+                        if formatted:
+                            content_types[formatted.get('content_type', 'unknown')] += 1
+
+            workers = [asyncio.create_task(scrape_worker()) for _ in range(num_workers)]
+            writer_task = asyncio.create_task(write_items())
+
+            await produce_urls()
+            for _ in workers:
+                await url_q.put(None)
+            await asyncio.gather(*workers)
+            await items_q.put(None)
+            await writer_task
+
+            writer.close()
+            total_items = writer.count
+
+    log_listener.stop()
     print(f"\n🎉 Scraping completed!")
-    print(f"📊 Total items found: {len(scraped_items)}")
+    print(f"📊 Total items found: {total_items}")
+    for content_type, count in content_types.most_common():
+        print(f"   - {content_type}: {count}")
     print(f"💾 Output saved to: {output_file}")
 
 
@@ -2,88 +2,163 @@
 Output formatter that formats scraped data into the required JSON structure.
 """
 
-from typing import List, Dict, Any
+import json
+from typing import Iterator, List, Dict, Any
 from config import MIN_CONTENT_LENGTH
 
+try:
+    # C-backed JSON encoder, several times faster than stdlib json
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes, preferring orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+# Map content types to the required format; built once so per-item
+# classification is a single dict lookup
+_CONTENT_TYPE_MAPPING = {
+    'blog': 'blog',
+    'pdf': 'book',  # PDFs are typically books or documents
+    'article': 'blog',
+    'post': 'blog',
+    'linkedin': 'linkedin_post',
+    'reddit': 'reddit_comment',
+    'podcast': 'podcast_transcript',
+    'call': 'call_transcript',
+    'transcript': 'call_transcript',
+    'book': 'book',
+    'document': 'book',
+    'other': 'other'
+}
+
+
+def _map_content_type(content_type: str) -> str:
+    """Map content types to the required format."""
+    # Exact match first: a single dict lookup settles the common case
+    mapped = _CONTENT_TYPE_MAPPING.get(content_type)
+    if mapped is not None:
+        return mapped
+
+    # Partial match on the lowercased value (lowercased once, not per key)
+    content_type_lower = content_type.lower()
+    mapped = _CONTENT_TYPE_MAPPING.get(content_type_lower)
+    if mapped is not None:
+        return mapped
+    for key, value in _CONTENT_TYPE_MAPPING.items():
+        if key in content_type_lower:
+            return value
+
+    return 'other'
+
+
+def _build_format_item():
+    """Generate the per-item formatter once at import time.
+
+    The output shape, field defaults and validity thresholds are all fixed,
+    so the function is emitted via exec with every constant inlined:
+    validation runs against the raw fields before the dict is built, and
+    invalid items never pay for the allocation at all. This is the hottest
+    pure-Python step of a large scrape (once per item).
+    """
+    src = (
+        "def _format_item(item):\n"
+        "    g = item.get\n"
+        "    content = g('content', '')\n"
+        "    # Length check first: it is free, and failing it covers empty content\n"
+        f"    if len(content) < {int(MIN_CONTENT_LENGTH)} or not content.strip():\n"
+        "        return None\n"
+        "    title = g('title', '')\n"
+        "    if not title.strip():\n"
+        "        return None\n"
+        "    return {\n"
+        "        'title': title,\n"
+        "        'content': content,\n"
+        "        'content_type': _map_content_type(g('content_type', 'other')),\n"
+        "        'source_url': g('source_url', ''),\n"
+        "        'author': g('author', ''),\n"
+        "        'user_id': g('user_id', '')\n"
+        "    }\n"
+    )
+    namespace = {'_map_content_type': _map_content_type}
+    exec(src, namespace)
+    return namespace['_format_item']
+
+
+_format_item = _build_format_item()
+
+
+class OutputStreamWriter:
+    """Incrementally writes the {team_id, items} document to a binary file.
+
+    Items are serialized one at a time, so peak memory stays constant no
+    matter how many items the scrape produces.
+    """
+
+    __slots__ = ('_formatter', '_fp', '_count')
+
+    def __init__(self, formatter: 'OutputFormatter', team_id: str, fp):
+        self._formatter = formatter
+        self._fp = fp
+        self._count = 0
+        fp.write(b'{"team_id": ' + _dumps(team_id) + b', "items": [')
+
+    def write(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Format and write one item; returns the formatted item or None."""
+        formatted = self._formatter.format_item(item)
+        if not formatted:
+            return None
+        if self._count:
+            self._fp.write(b',')
+        self._fp.write(b'\n' + _dumps(formatted))
+        self._count += 1
+        return formatted
+
+    def close(self):
+        """Terminate the items array and the enclosing document."""
+        self._fp.write(b'\n]}' if self._count else b']}')
+
+    @property
+    def count(self) -> int:
+        return self._count
+
 
 class OutputFormatter:
-    """Formats scraped data into the required output structure."""
-    
-    def format_output(self, team_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Format the scraped items into the required output structure."""
-        formatted_items = []
-        
+    """Formats scraped data into the required output structure.
+
+    Stateless; the heavy lifting lives in the module-level helpers so the
+    hot per-item path avoids method dispatch.
+    """
+
+    __slots__ = ()
+
+    def iter_formatted(self, items) -> Iterator[Dict[str, Any]]:
+        """Yield formatted items one at a time, skipping invalid ones.
+
+        Lets streaming consumers format lazily without ever holding the
+        whole formatted list in memory.
+        """
         for item in items:
-            formatted_item = self._format_item(item)
+            formatted_item = _format_item(item)
             if formatted_item:
-                formatted_items.append(formatted_item)
-        
+                yield formatted_item
+
+    def format_output(self, team_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Format the scraped items into the required output structure."""
         return {
             "team_id": team_id,
-            "items": formatted_items
-        }
-    
-    def _format_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Format a single item according to the required structure."""
-        # Map content types to the required format
-        content_type = self._map_content_type(item.get('content_type', 'other'))
-        
-        # Ensure all required fields are present with exact format
-        formatted_item = {
-            "title": item.get('title', ''),
-            "content": item.get('content', ''),
-            "content_type": content_type,
-            "source_url": item.get('source_url', ''),
-            "author": item.get('author', ''),
-            "user_id": item.get('user_id', '')
+            "items": list(self.iter_formatted(items))
         }
-        
-        # Validate and clean the item
-        if self._is_valid_item(formatted_item):
-            return formatted_item
-        else:
-            return None
-    
-    def _map_content_type(self, content_type: str) -> str:
-        """Map content types to the required format."""
-        content_type_mapping = {
-            'blog': 'blog',
-            'pdf': 'book',  # PDFs are typically books or documents
-            'article': 'blog',
-            'post': 'blog',
-            'linkedin': 'linkedin_post',
-            'reddit': 'reddit_comment',
-            'podcast': 'podcast_transcript',
-            'call': 'call_transcript',
-            'transcript': 'call_transcript',
-            'book': 'book',
-            'document': 'book',
-            'other': 'other'
-        }
-        
-        # Try exact match first
-        if content_type in content_type_mapping:
-            return content_type_mapping[content_type]
-        
-        # Try partial match
-        for key, value in content_type_mapping.items():
-            if key in content_type.lower():
-                return value
-        
-        return 'other'
-    
-    def _is_valid_item(self, item: Dict[str, Any]) -> bool:
-        """Check if an item is valid and should be included."""
-        # Must have a title
-        if not item.get('title', '').strip():
-            return False
-        
-        # Must have content
-        if not item.get('content', '').strip():
-            return False
-        
-        # Content should be reasonably long
-        if len(item.get('content', '')) < MIN_CONTENT_LENGTH:
-            return False
-        
-        return True 
\ No newline at end of file
+
+    def format_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Format a single item, returning None if it is not valid."""
+        return _format_item(item)
+
+    def stream_writer(self, team_id: str, fp) -> OutputStreamWriter:
+        """Create a writer that streams formatted items to a binary file."""
+        return OutputStreamWriter(self, team_id, fp)
\ No newline at end of file
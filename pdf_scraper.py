@@ -5,36 +5,122 @@ Supports multiple PDF processing libraries for better compatibility.
 
 import asyncio
 import aiohttp
-import requests
+import logging
 from typing import Dict, Any, Optional, List, Tuple
+from bisect import bisect_left
+from itertools import accumulate
+import math
 import re
 import os
-import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urlparse
 import PyPDF2
 import pdfplumber
 from io import BytesIO
-import time
+from http_client import create_session, ResponseDiskCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    # C-backed engine (already a pinned dependency); parses PDFs many times
+    # faster than the pure-Python readers
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Text-cleaning and chunking patterns, compiled once at import
+_WS_RE = re.compile(r'\s+')
+# Both page-number shapes ("X of Y" and "Page X") in one alternation/pass;
+# "Page X" optionally swallows a trailing "of Y" so composite footers like
+# "Page 3 of 10" are removed whole rather than leaving an orphaned "of 10"
+_PAGE_NUM_RE = re.compile(r'\bPage\s+\d+(?:\s*of\s*\d+)?\b|\b\d+\s*of\s*\d+\b')
+_NL_RE = re.compile(r'\n\s*\n')
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+_ALLOWED_PUNCT = set('.,!?;:-()[]{}"\'')
+
+
+class _ArtifactTable(dict):
+    """Translate table mapping PDF-artifact characters to spaces.
+
+    Equivalent to substituting ' ' for [^\\w\\s<punctuation>], but runs as a
+    single C-level str.translate pass. Verdicts are memoized per code point,
+    so the Python-level check fires once per distinct character ever seen.
+    """
+
+    def __missing__(self, codepoint):
+        ch = chr(codepoint)
+        if ch.isalnum() or ch.isspace() or ch == '_' or ch in _ALLOWED_PUNCT:
+            verdict = codepoint  # keep the character
+        else:
+            verdict = 0x20  # replace with a space
+        self[codepoint] = verdict
+        return verdict
+
+
+_ARTIFACT_TABLE = _ArtifactTable()
+
+# Pages per worker below which forking processes is not worth the overhead
+_PAGES_PER_WORKER = 8
+
+# Downloaded PDFs are cached on disk so reruns and overlapping crawls skip
+# the network entirely; entries older than the TTL are revalidated via ETag
+_PDF_CACHE = ResponseDiskCache(
+    'ogtool_pdf_cache',
+    ttl=int(os.getenv('SCRAPER_PDF_CACHE_TTL', str(24 * 3600))),
+    suffix='.pdf'
+)
+
+
+def _has_content(text: Optional[str], threshold: int = 100) -> bool:
+    """True when text is longer than threshold and not just whitespace.
+
+    Stands in for ``len(text.strip()) > threshold`` without copying what
+    may be a multi-megabyte string just to measure it; scanning the first
+    few KB is enough to rule out all-whitespace output.
+    """
+    return (text is not None and len(text) > threshold
+            and any(not ch.isspace() for ch in text[:4096]))
+
+
+def _extract_pages_range(pdf_content: bytes, start: int, end: int) -> str:
+    """Worker: extract text for pages [start, end) in its own process."""
+    parts = []
+    with pdfplumber.open(BytesIO(pdf_content)) as pdf:
+        for page in pdf.pages[start:end]:
+            page_text = page.extract_text()
+            if page_text:
+                parts.append(page_text)
+    return "\n".join(parts)
 
 
 class PDFScraper:
     """PDF scraper class that handles PDF extraction and chunking."""
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, max_retries: int = 3):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, max_retries: int = 3,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 max_concurrent_downloads: int = 8):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.max_retries = max_retries
-        self.session = None
-    
+        self.session = session
+        self._owns_session = False
+        # Bounds simultaneous PDF downloads so bulk fan-outs cannot exhaust
+        # the connection pool or trip host rate limits
+        self._download_sem = asyncio.Semaphore(max_concurrent_downloads)
+
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = aiohttp.ClientSession()
+        if self.session is None:
+            self.session = create_session()
+            self._owns_session = True
         return self
-    
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
+            self.session = None
     
     async def scrape_pdf(self, url: str, user_id: str) -> List[Dict[str, Any]]:
         """Scrape a PDF file and return chunked content."""
@@ -42,21 +128,18 @@ class PDFScraper:
             # Download the PDF
             pdf_content = await self._download_pdf(url)
             if not pdf_content:
-                print(f"Failed to download PDF from {url}")
+                logger.warning("Failed to download PDF from %s", url)
                 return []
             
-            # Extract text from PDF
-            text_content = await self._extract_text_from_pdf(pdf_content)
+            # Extract text and metadata in a single parse
+            text_content, metadata = await self._extract_text_and_metadata(pdf_content, url)
             if not text_content:
-                print(f"Failed to extract text from PDF {url}")
+                logger.warning("Failed to extract text from PDF %s", url)
                 return []
-            
+
             # Clean and process the text
             cleaned_text = self._clean_text(text_content)
             
-            # Extract metadata
-            metadata = await self._extract_metadata(pdf_content, url)
-            
             # Chunk the content
             chunks = self._chunk_text(cleaned_text)
             
@@ -82,86 +165,63 @@ class PDFScraper:
             return items
             
         except Exception as e:
-            print(f"Error scraping PDF {url}: {e}")
+            logger.error("Error scraping PDF %s: %s", url, e)
             return []
     
     async def _download_pdf(self, url: str) -> Optional[bytes]:
-        """Download PDF content from URL."""
+        """Download PDF content from URL, reusing the on-disk cache."""
         if not self.session:
-            self.session = aiohttp.ClientSession()
-        
+            self.session = create_session()
+            self._owns_session = True
+
+        cached, etag = _PDF_CACHE.get(url)
+        if cached is not None:
+            logger.debug("Using cached PDF for %s", url)
+            return cached
+
+        # A stale cache entry with an ETag still saves the transfer when
+        # the server answers the conditional GET with 304
+        headers = {'If-None-Match': etag} if etag else {}
+
         for attempt in range(self.max_retries):
             try:
-                async with self.session.get(url, timeout=30) as response:
+                async with self._download_sem, self.session.get(url, timeout=30, headers=headers) as response:
+                    if response.status == 304:
+                        content = _PDF_CACHE.get_stale(url)
+                        if content is not None:
+                            return content
+                        # Cache file vanished; retry unconditionally
+                        headers = {}
+                        continue
                     if response.status == 200:
                         content_type = response.headers.get('content-type', '').lower()
                         # Accept both PDF and octet-stream content types
-                        if ('pdf' in content_type or 
-                            'octet-stream' in content_type or 
+                        if ('pdf' in content_type or
+                            'octet-stream' in content_type or
                             url.lower().endswith('.pdf')):
-                            return await response.read()
+                            content = await response.read()
+                            _PDF_CACHE.put(url, content, response.headers.get('ETag'))
+                            return content
                         else:
-                            print(f"URL does not point to a PDF: {content_type}")
+                            logger.warning("URL does not point to a PDF: %s", content_type)
                             return None
                     else:
-                        print(f"HTTP {response.status} for {url}")
+                        logger.warning("HTTP %s for %s", response.status, url)
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed for {url}: {e}")
+                logger.warning("Attempt %d failed for %s: %s", attempt + 1, url, e)
                 if attempt < self.max_retries - 1:
                     await asyncio.sleep(2 * (attempt + 1))
-        
+
         return None
-    
-    async def _extract_text_from_pdf(self, pdf_content: bytes) -> Optional[str]:
-        """Extract text from PDF content using multiple libraries for better compatibility."""
-        text = ""
-        
-        # Try pdfplumber first (better text extraction)
-        try:
-            text = self._extract_with_pdfplumber(pdf_content)
-            if text and len(text.strip()) > 100:
-                return text
-        except Exception as e:
-            print(f"pdfplumber extraction failed: {e}")
-        
-        # Try PyPDF2 as fallback
-        try:
-            text = self._extract_with_pypdf2(pdf_content)
-            if text and len(text.strip()) > 100:
-                return text
-        except Exception as e:
-            print(f"PyPDF2 extraction failed: {e}")
-        
-        return text if text.strip() else None
-    
-    def _extract_with_pdfplumber(self, pdf_content: bytes) -> str:
-        """Extract text using pdfplumber."""
-        text = ""
-        
-        with pdfplumber.open(BytesIO(pdf_content)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        return text
-    
-    def _extract_with_pypdf2(self, pdf_content: bytes) -> str:
-        """Extract text using PyPDF2."""
-        text = ""
-        
-        pdf_file = BytesIO(pdf_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-        
-        return text
-    
-    async def _extract_metadata(self, pdf_content: bytes, url: str) -> Dict[str, Any]:
-        """Extract metadata from PDF."""
+
+    async def _extract_text_and_metadata(self, pdf_content: bytes, url: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Extract text and metadata from a PDF in a single parse.
+
+        PyMuPDF's C engine handles the common case when installed; otherwise
+        one PyPDF2.PdfReader pass yields both the document metadata and the
+        page text, with pdfplumber (a second full parse, but better
+        extraction) only running when that text is insufficient.
+        """
         metadata = {
             'title': '',
             'author': '',
@@ -170,33 +230,105 @@ class PDFScraper:
             'producer': '',
             'num_pages': 0
         }
-        
-        try:
-            # Try PyPDF2 for metadata
-            pdf_file = BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            metadata['num_pages'] = len(pdf_reader.pages)
-            
-            # Get document metadata
-            if pdf_reader.metadata:
-                metadata['title'] = pdf_reader.metadata.get('/Title', '')
-                metadata['author'] = pdf_reader.metadata.get('/Author', '')
-                metadata['subject'] = pdf_reader.metadata.get('/Subject', '')
-                metadata['creator'] = pdf_reader.metadata.get('/Creator', '')
-                metadata['producer'] = pdf_reader.metadata.get('/Producer', '')
-            
-        except Exception as e:
-            print(f"Failed to extract metadata: {e}")
-        
+        text = ""
+
+        # Fast path: PyMuPDF's C engine gives text and metadata in one pass
+        if fitz is not None:
+            try:
+                text, metadata = self._extract_with_pymupdf(pdf_content)
+            except Exception as e:
+                logger.warning("PyMuPDF extraction failed: %s", e)
+
+        if not _has_content(text):
+            try:
+                pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_content))
+                metadata['num_pages'] = len(pdf_reader.pages)
+
+                # Get document metadata
+                if pdf_reader.metadata:
+                    metadata['title'] = pdf_reader.metadata.get('/Title', '')
+                    metadata['author'] = pdf_reader.metadata.get('/Author', '')
+                    metadata['subject'] = pdf_reader.metadata.get('/Subject', '')
+                    metadata['creator'] = pdf_reader.metadata.get('/Creator', '')
+                    metadata['producer'] = pdf_reader.metadata.get('/Producer', '')
+
+                parts = []
+                for page in pdf_reader.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        parts.append(page_text)
+                text = "\n".join(parts) + "\n" if parts else ""
+            except Exception as e:
+                logger.warning("PyPDF2 extraction failed: %s", e)
+
+        # Fall back to pdfplumber only when PyPDF2 text is insufficient
+        if not _has_content(text):
+            try:
+                plumber_text = self._extract_with_pdfplumber(pdf_content)
+                if plumber_text and len(plumber_text.strip()) > len(text.strip()):
+                    text = plumber_text
+            except Exception as e:
+                logger.warning("pdfplumber extraction failed: %s", e)
+
         # Fallback title from URL
         if not metadata['title']:
             parsed_url = urlparse(url)
             filename = os.path.basename(parsed_url.path)
             if filename:
                 metadata['title'] = filename.replace('.pdf', '').replace('_', ' ').title()
-        
-        return metadata
+
+        return (text if text.strip() else None), metadata
+    
+    def _extract_with_pymupdf(self, pdf_content: bytes) -> Tuple[str, Dict[str, Any]]:
+        """Extract text and metadata with PyMuPDF's C-backed renderer."""
+        doc = fitz.open(stream=pdf_content, filetype='pdf')
+        try:
+            parts = []
+            for page in doc:
+                page_text = page.get_text()
+                if page_text:
+                    parts.append(page_text)
+            doc_meta = doc.metadata or {}
+            metadata = {
+                'title': doc_meta.get('title') or '',
+                'author': doc_meta.get('author') or '',
+                'subject': doc_meta.get('subject') or '',
+                'creator': doc_meta.get('creator') or '',
+                'producer': doc_meta.get('producer') or '',
+                'num_pages': doc.page_count
+            }
+            text = "\n".join(parts) + "\n" if parts else ""
+            return text, metadata
+        finally:
+            doc.close()
+
+    def _extract_with_pdfplumber(self, pdf_content: bytes) -> str:
+        """Extract text using pdfplumber, fanning big documents out to a
+        process pool so page parsing uses every core."""
+        with pdfplumber.open(BytesIO(pdf_content)) as pdf:
+            num_pages = len(pdf.pages)
+
+            # Small documents: extract inline, workers would cost more
+            # than they save
+            if num_pages <= _PAGES_PER_WORKER:
+                parts = []
+                for page in pdf.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        parts.append(page_text)
+                return "\n".join(parts) + "\n" if parts else ""
+
+        workers = min(os.cpu_count() or 1, math.ceil(num_pages / _PAGES_PER_WORKER))
+        span = math.ceil(num_pages / workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extract_pages_range, pdf_content,
+                                start, min(start + span, num_pages))
+                for start in range(0, num_pages, span)
+            ]
+            parts = [future.result() for future in futures]
+
+        return "\n".join(p for p in parts if p) + "\n"
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize extracted text."""
@@ -204,17 +336,16 @@ class PDFScraper:
             return ""
         
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove page numbers and headers/footers
-        text = re.sub(r'\b\d+\s*of\s*\d+\b', '', text)  # "Page X of Y"
-        text = re.sub(r'\bPage\s+\d+\b', '', text)  # "Page X"
-        
-        # Remove common PDF artifacts
-        text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)\[\]\{\}\"\']', ' ', text)
-        
+        text = _WS_RE.sub(' ', text)
+
+        # Remove page numbers and headers/footers ("Page X of Y", "Page X")
+        text = _PAGE_NUM_RE.sub('', text)
+
+        # Remove common PDF artifacts in one translate pass
+        text = text.translate(_ARTIFACT_TABLE)
+
         # Normalize line breaks
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = _NL_RE.sub('\n\n', text)
         
         # Remove leading/trailing whitespace
         text = text.strip()
@@ -253,34 +384,42 @@ class PDFScraper:
             return []
         
         # Split by sentences first to maintain context
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
+        sentences = _SENT_RE.split(text)
+
+        # Cumulative sentence lengths (separator space included), computed
+        # once; each chunk's overlap window is then located with a single
+        # bisect instead of a backward scan over the preceding sentences
+        cum = [0]
+        cum.extend(accumulate(len(s) + 1 for s in sentences))
+
         chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
+        current = []      # sentences of the chunk under construction
+        current_len = 0   # running length including separator spaces
+
+        for idx, sentence in enumerate(sentences):
             # If adding this sentence would exceed chunk size
-            if len(current_chunk) + len(sentence) > self.chunk_size and current_chunk:
-                chunks.append(current_chunk.strip())
-                
+            if current and current_len + len(sentence) > self.chunk_size:
+                chunks.append(' '.join(current).strip())
+
                 # Start new chunk with overlap
+                overlap = []
+                overlap_len = 0
                 if self.chunk_overlap > 0:
-                    # Find the last few sentences that fit within overlap
-                    overlap_text = ""
-                    for prev_sentence in reversed(sentences[:sentences.index(sentence)]):
-                        if len(overlap_text) + len(prev_sentence) <= self.chunk_overlap:
-                            overlap_text = prev_sentence + " " + overlap_text
-                        else:
-                            break
-                    current_chunk = overlap_text + sentence
-                else:
-                    current_chunk = sentence
+                    # Largest trailing run of sentences fitting the overlap
+                    j = bisect_left(cum, cum[idx] - self.chunk_overlap - 1)
+                    overlap = sentences[j:idx]
+                    overlap_len = cum[idx] - cum[j]
+                current = overlap + [sentence]
+                current_len = overlap_len + len(sentence)
             else:
-                current_chunk += " " + sentence if current_chunk else sentence
-        
+                current.append(sentence)
+                current_len += len(sentence) + (1 if current_len else 0)
+
         # Add the last chunk if it has content
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        if current:
+            last_chunk = ' '.join(current).strip()
+            if last_chunk:
+                chunks.append(last_chunk)
         
         # Ensure chunks are not too small
         final_chunks = []
@@ -293,20 +432,24 @@ class PDFScraper:
         
         return final_chunks
     
-    def is_pdf_url(self, url: str) -> bool:
+    @staticmethod
+    def is_pdf_url(url: str) -> bool:
         """Check if the URL points to a PDF file."""
-        url_lower = url.lower()
-        
+        return PDFScraper._is_pdf_url(url.lower())
+
+    @staticmethod
+    def _is_pdf_url(url_lower: str) -> bool:
+        """Variant that assumes the URL is already lowercased."""
         # Check file extension
         if url_lower.endswith('.pdf'):
             return True
-        
+
         # Check for PDF in URL path
-        if '/pdf' in url_lower or 'pdf' in url_lower:
+        if 'pdf' in url_lower:
             return True
-        
+
         # Check for Google Drive PDF links
         if 'drive.google.com' in url_lower and ('/file/' in url_lower or '/folders/' in url_lower):
             return True
-        
+
         return False 
\ No newline at end of file
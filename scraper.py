@@ -5,34 +5,300 @@ Uses multiple strategies for different types of content.
 
 import asyncio
 import aiohttp
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+import soupsieve
 from playwright.async_api import async_playwright
-from markdownify import markdownify
+from markdownify import markdownify, MarkdownConverter
 from typing import Dict, Any, Optional, List
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import os
+import random
 import re
 from urllib.parse import urljoin, urlparse
-import time
+from urllib.robotparser import RobotFileParser
 from config import *
+from http_client import create_session, ResponseDiskCache
+from url_processor import canonicalize_url
+
+# Markdown cleanup patterns, compiled once at import instead of per page.
+# The whitespace rules (collapse 3+ newlines to a blank line, collapse
+# space runs) are fused into one alternation so cleanup makes a single
+# pass over the document instead of three full-string rewrites.
+_RE_WS_FUSED = re.compile(r'((?:\n[ \t]*){2,}\n)| {2,}')
+_RE_HEADER = re.compile(r'(\n#+\s+[^\n]+)')
+_RE_LIST = re.compile(r'(\n[-*+]\s+[^\n]+)')
+_RE_PARA = re.compile(r'(\n\n[^\n#\-\*\+][^\n]*\n[^\n#\-\*\+][^\n]*)')
+_RE_TRAIL_NL = re.compile(r'\n+$')
+
+# Converter reused across pages; convert_soup works on an already-parsed
+# node, where markdownify(str) would re-parse HTML we just parsed
+_MD_CONVERTER = MarkdownConverter(
+    heading_style=MARKDOWN_HEADING_STYLE,
+    bullets=MARKDOWN_BULLETS
+)
+
+# CSS selectors compiled once; soup.select_one with a string re-parses the
+# selector (via soupsieve) on every page otherwise. Order is preserved
+# because the lists encode priority, not just coverage.
+_TITLE_SELECTORS = [soupsieve.compile(s) for s in TITLE_SELECTORS]
+_CONTENT_SELECTORS = [soupsieve.compile(s) for s in CONTENT_SELECTORS]
+_AUTHOR_SELECTORS = [soupsieve.compile(s) for s in AUTHOR_SELECTORS]
+_ALL_SELECTORS = _TITLE_SELECTORS + _CONTENT_SELECTORS + _AUTHOR_SELECTORS
+
+
+def _first_matches(soup: BeautifulSoup) -> dict:
+    """Record each selector's first matching element in one DOM walk.
+
+    Equivalent to select_one per selector (descendants order is the same
+    depth-first pre-order), but the tree is traversed once for all three
+    selector groups instead of once per lookup.
+    """
+    pending = list(_ALL_SELECTORS)
+    found = {}
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            continue
+        matched = False
+        for selector in pending:
+            if selector.match(element):
+                found[selector] = element
+                matched = True
+        if matched:
+            pending = [s for s in pending if s not in found]
+            if not pending:
+                break
+    return found
+
+def _extract_title(matches: dict) -> str:
+    """Extract the page title."""
+    for selector in _TITLE_SELECTORS:
+        title_elem = matches.get(selector)
+        if title_elem and title_elem.get_text().strip():
+            title = title_elem.get_text().strip()
+            if MIN_TITLE_LENGTH <= len(title) <= MAX_TITLE_LENGTH:
+                return title
+
+    return ""
+
+
+def _extract_main_content(matches: dict, soup: BeautifulSoup):
+    """Extract the main content node from the page (or None)."""
+    for selector in _CONTENT_SELECTORS:
+        content_elem = matches.get(selector)
+        if content_elem and len(content_elem.get_text().strip()) > MIN_CONTENT_LENGTH:
+            return content_elem
+
+    # Fallback: the whole body
+    return soup.find('body')
+
+
+def _extract_author(matches: dict) -> str:
+    """Extract the author information."""
+    for selector in _AUTHOR_SELECTORS:
+        author_elem = matches.get(selector)
+        if author_elem:
+            if author_elem.name == 'meta':
+                return author_elem.get('content', '')
+            else:
+                return author_elem.get_text().strip()
+
+    return ""
+
+
+def _parse_page(html: str, url: str, output_format: str = 'markdown') -> Dict[str, Any]:
+    """Parse HTML content and extract structured data.
+
+    Module-level (and picklable) so it can run in a worker process:
+    parsing and markdown conversion are pure-Python CPU work that would
+    otherwise block the event loop and starve concurrent network I/O.
+    """
+    soup = BeautifulSoup(html, 'lxml')
+
+    # Remove script and style elements
+    for element in soup(["script", "style", "nav", "footer", "header"]):
+        element.decompose()
+
+    # One walk resolves every selector's first match; the extractors
+    # then just apply their priority and validation rules
+    matches = _first_matches(soup)
+
+    title = _extract_title(matches)
+
+    content_elem = _extract_main_content(matches, soup)
+    if content_elem is None:
+        content = ""
+    elif output_format == 'text':
+        # Plain text skips markdown conversion entirely; get_text is
+        # orders of magnitude cheaper than markdownify
+        content = content_elem.get_text(' ', strip=True)
+    else:
+        # Convert the parsed content node straight to markdown, skipping
+        # the serialize-and-re-parse round trip
+        content = _MD_CONVERTER.convert_soup(content_elem)
+
+    author = _extract_author(matches)
+
+    return {
+        'title': title,
+        'content': content,
+        'author': author
+    }
+
+
+# Fetched pages are cached on disk so repeat crawls revalidate with a
+# conditional GET (or skip the network entirely while fresh)
+_HTML_CACHE = ResponseDiskCache(
+    'ogtool_html_cache',
+    ttl=int(os.getenv('SCRAPER_HTML_CACHE_TTL', '3600')),
+    suffix='.html'
+)
+
+# Markers of client-side-rendered pages where the plain HTML is an empty
+# shell and only a browser render will produce content
+_SPA_MARKERS = (
+    '__NEXT_DATA__',
+    'data-reactroot',
+    'ng-version',
+    'id="root"',
+    "id='root'",
+    '<noscript'
+)
+
+# Resource types that never contribute to extracted text; aborting their
+# requests cuts JS render time substantially
+_SKIPPED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+
+@lru_cache(maxsize=4096)
+def _content_type_for(haystack: str) -> str:
+    """Classify a lowered url+title haystack; cached because listing
+    expansions test many URLs sharing the same host and title prefixes.
+
+    One scan finds every pattern occurrence, and the earliest type in
+    CONTENT_TYPE_PATTERNS order wins, matching the old per-type loop.
+    """
+    found = {m.lastgroup for m in CONTENT_TYPE_FUSED_RE.finditer(haystack)}
+    if found:
+        for content_type in CONTENT_TYPE_PRIORITY:
+            if content_type in found:
+                return content_type
+    return 'other'
+
+
+def _collapse_whitespace(match):
+    """Replacement callback for _RE_WS_FUSED: blank line or single space."""
+    return '\n\n' if match.group(1) is not None else ' '
+
+
+# The whole blog-card scan runs inside the browser: clickability and
+# content heuristics, dedup by leading text, and href resolution. One
+# evaluate call replaces four-plus IPC round-trips per DOM node.
+_FIND_BLOG_CARDS_JS = """
+() => {
+    const out = [];
+    const seen = new Set();
+    document.querySelectorAll('a, button, div, article, section').forEach(el => {
+        const text = el.textContent || '';
+        const cls = typeof el.className === 'string' ? el.className : '';
+        const tag = el.tagName.toLowerCase();
+        const clickable = tag === 'a' || tag === 'button' ||
+            /cursor|hover|click/.test(cls) ||
+            el.onclick !== null || el.getAttribute('role') === 'button';
+        const blog = /blog|post|article|read|more/i.test(text) ||
+            /card|post|article|blog/i.test(cls);
+        if (clickable && blog && text.trim().length > 50) {
+            const key = text.trim().slice(0, 50);
+            if (!seen.has(key)) {
+                seen.add(key);
+                const href = el.href ||
+                    (el.querySelector('a') && el.querySelector('a').href) || null;
+                out.push({href: href, tag: tag, text: text.slice(0, 100)});
+            }
+        }
+    });
+    return out;
+}
+"""
+
+
+async def _route_filter(route):
+    """Abort requests for resources the text extraction never needs."""
+    if route.request.resource_type in _SKIPPED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
 
 
 class WebScraper:
     """Main web scraper class that handles both HTML and JavaScript pages."""
     
-    def __init__(self, delay: float = SCRAPING_DELAY, max_retries: int = MAX_RETRIES):
+    def __init__(self, delay: float = SCRAPING_DELAY, max_retries: int = MAX_RETRIES,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 concurrency: int = 16):
         self.delay = delay
         self.max_retries = max_retries
-        self.session = None
-    
+        self.session = session
+        self._owns_session = False
+        # Global in-flight cap for scrape_many; the politeness delay is
+        # tracked per host so one slow host never throttles the whole batch
+        self._sem = asyncio.Semaphore(concurrency)
+        self._host_locks = {}
+        # Token bucket per host: (tokens, last refill time). The bucket
+        # refills at one token per delay interval, so short bursts go out
+        # immediately while the sustained rate stays polite
+        self._host_buckets = {}
+        self._host_crawl_delay = {}
+        # One Chromium instance shared across pages; launching a browser
+        # costs seconds, a new_context() per URL costs milliseconds
+        self._pw = None
+        self._browser = None
+        self._contexts_served = 0
+        # Worker processes for CPU-bound parsing, created on first use
+        self._pool = None
+
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = aiohttp.ClientSession()
+        if self.session is None:
+            self.session = create_session()
+            self._owns_session = True
         return self
-    
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self.session:
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
+        if self.session and self._owns_session:
             await self.session.close()
+            self.session = None
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    async def _get_browser(self):
+        """Return the shared Chromium instance, launching it on first use."""
+        if self._browser is None:
+            if self._pw is None:
+                self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch(headless=True)
+        return self._browser
+
+    async def _new_context(self):
+        """Open a context on the shared browser, recycling the browser
+        itself every BROWSER_POOL_RECYCLE_AFTER contexts so a long crawl
+        cannot accumulate renderer memory indefinitely."""
+        if self._browser and self._contexts_served >= BROWSER_POOL_RECYCLE_AFTER:
+            await self._browser.close()
+            self._browser = None
+            self._contexts_served = 0
+        browser = await self._get_browser()
+        self._contexts_served += 1
+        # User agent set at the context level to avoid detection
+        return await browser.new_context(user_agent=USER_AGENT)
     
     async def scrape_listing_page(self, url: str, user_id: str) -> List[Dict[str, Any]]:
         """Scrape a listing page and return all individual blog post items."""
@@ -49,191 +315,296 @@ class WebScraper:
             print(f"Error scraping listing page {url}: {e}")
             return []
     
-    async def scrape_page(self, url: str, user_id: str) -> Optional[Dict[str, Any]]:
-        """Scrape a single page and return structured data."""
+    async def scrape_many(self, urls: List[str], user_id: str) -> List[Optional[Dict[str, Any]]]:
+        """Scrape many pages concurrently, bounded by the scraper's semaphore."""
+        return await asyncio.gather(
+            *(self.scrape_page(url, user_id) for url in urls),
+            return_exceptions=True
+        )
+
+    async def _host_interval(self, host: str, scheme: str) -> float:
+        """Per-host request interval: the configured delay, raised to the
+        site's robots.txt Crawl-delay when one is published. Fetched once
+        per host; failures fall back to the configured delay."""
+        interval = self._host_crawl_delay.get(host)
+        if interval is None:
+            if not self.session:
+                self.session = create_session()
+                self._owns_session = True
+            interval = self.delay
+            try:
+                robots_url = f"{scheme or 'https'}://{host}/robots.txt"
+                async with self.session.get(robots_url, timeout=10) as response:
+                    if response.status == 200:
+                        parser = RobotFileParser()
+                        parser.parse((await response.text()).splitlines())
+                        crawl_delay = parser.crawl_delay('*')
+                        if crawl_delay:
+                            interval = max(interval, float(crawl_delay))
+            except Exception:
+                pass
+            self._host_crawl_delay[host] = interval
+        return interval
+
+    async def _respect_host_delay(self, url: str):
+        """Rate-limit requests per host with a token bucket.
+
+        Unlike a fixed sleep between requests, the bucket lets a small
+        burst through at full speed and only throttles the sustained rate,
+        which matters when many URLs on one host resolve from cache."""
+        if self.delay <= 0:
+            return
+        parsed = urlparse(url)
+        host = parsed.netloc
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            interval = await self._host_interval(host, parsed.scheme)
+            loop = asyncio.get_event_loop()
+            now = loop.time()
+            tokens, last = self._host_buckets.get(host, (float(TOKEN_BUCKET_BURST), now))
+            tokens = min(TOKEN_BUCKET_BURST, tokens + (now - last) / interval)
+            if tokens < 1:
+                await asyncio.sleep((1 - tokens) * interval)
+                now = loop.time()
+                tokens = 1
+            self._host_buckets[host] = (tokens - 1, now)
+
+    async def scrape_page(self, url: str, user_id: str,
+                          output_format: str = 'markdown') -> Optional[Dict[str, Any]]:
+        """Scrape a single page and return structured data.
+
+        output_format is 'markdown' (default), 'text' or 'html'. Plain
+        text is extracted straight from the parsed tree and skips the
+        markdown conversion and cleanup passes entirely.
+        """
         try:
-            # Check if this is a listing page
-            if self._is_listing_page(url):
-                items = await self._scrape_listing_page(url, user_id)
-                # For now, return the first item if there are multiple
-                # In the future, this could be modified to return all items
-                return items[0] if items else None
-            
-            # Try simple HTML scraping first
-            content = await self._scrape_html(url)
-            
-            # If no content found, try JavaScript rendering
-            if not content or not content.get('content'):
-                content = await self._scrape_javascript(url)
-            
-            if not content or not content.get('content'):
-                print(f"No content found for {url}")
-                return None
-            
-            # Add metadata
-            content['source_url'] = url
-            content['user_id'] = user_id
-            
-            # Determine content type
-            content['content_type'] = self._determine_content_type(url, content)
-            
-            # Clean and format content
-            content['content'] = self._clean_content(content['content'])
-            
-            await asyncio.sleep(self.delay)
-            return content
-            
+            async with self._sem:
+                # Check if this is a listing page
+                if self._is_listing_page(url):
+                    items = await self._scrape_listing_page(url, user_id)
+                    # For now, return the first item if there are multiple
+                    # In the future, this could be modified to return all items
+                    return items[0] if items else None
+
+                await self._respect_host_delay(url)
+
+                # Try simple HTML scraping first
+                content, html = await self._scrape_html(url, output_format)
+
+                # Fall back to JavaScript rendering only when the HTML looks
+                # like it actually needs it; launching a browser for a page
+                # that is merely empty or 404 wastes seconds
+                if (not content or not content.get('content')) and self._needs_js(html):
+                    content = await self._scrape_javascript(url, output_format)
+
+                if not content or not content.get('content'):
+                    print(f"No content found for {url}")
+                    return None
+
+                # Add metadata
+                content['source_url'] = url
+                content['user_id'] = user_id
+
+                # Determine content type
+                content['content_type'] = self._determine_content_type(url, content)
+
+                # Clean and format content; plain text was already
+                # extracted clean and markdown cleanup would mangle it
+                if output_format != 'text':
+                    content['content'] = self._clean_content(content['content'])
+
+                return content
+
         except Exception as e:
             print(f"Error scraping {url}: {e}")
             return None
     
-    async def _scrape_html(self, url: str) -> Optional[Dict[str, Any]]:
-        """Scrape content using simple HTTP requests."""
+    async def _scrape_html(self, url: str, output_format: str = 'markdown'):
+        """Scrape content using simple HTTP requests.
+
+        Returns (parsed content, raw HTML); the HTML lets callers judge
+        whether a JavaScript render could do any better. The HTML is None
+        when no response was received at all, or on a 403 where a browser
+        may get past a bot wall the plain client cannot.
+        """
         if not self.session:
-            self.session = aiohttp.ClientSession()
-        
+            self.session = create_session()
+            self._owns_session = True
+
+        cached, etag = _HTML_CACHE.get(url)
+        if cached is not None:
+            html = cached.decode('utf-8', 'replace')
+            return await self._parse_in_executor(html, url, output_format), html
+
+        # A stale entry with an ETag still saves the body transfer when
+        # the server answers the conditional GET with 304
+        headers = {'If-None-Match': etag} if etag else {}
+
+        html = None
         for attempt in range(self.max_retries):
             try:
-                async with self.session.get(url, timeout=REQUEST_TIMEOUT) as response:
+                async with self.session.get(url, timeout=REQUEST_TIMEOUT, headers=headers) as response:
+                    if response.status == 304:
+                        body = _HTML_CACHE.get_stale(url)
+                        if body is not None:
+                            html = body.decode('utf-8', 'replace')
+                            return await self._parse_in_executor(html, url, output_format), html
+                        # Cache entry vanished; retry unconditionally
+                        headers = {}
+                        continue
                     if response.status == 200:
-                        html = await response.text()
-                        return self._parse_html(html, url)
+                        ctype = response.headers.get('content-type', '').lower()
+                        if ctype and 'html' not in ctype and 'text' not in ctype:
+                            print(f"Skipping non-HTML response ({ctype}) for {url}")
+                            return None, ''
+                        length = response.headers.get('content-length')
+                        if length and int(length) > MAX_PAGE_BYTES:
+                            print(f"Skipping oversized page ({length} bytes) for {url}")
+                            return None, ''
+
+                        # Stream with a hard cap so one pathological page
+                        # cannot buffer unbounded memory or stall the pool
+                        buf = bytearray()
+                        async for chunk in response.content.iter_chunked(65536):
+                            buf.extend(chunk)
+                            if len(buf) > MAX_PAGE_BYTES:
+                                break
+
+                        # Explicit decode skips the charset sniffing that
+                        # response.text() runs on undeclared encodings
+                        html = buf.decode(response.charset or 'utf-8', 'replace')
+                        _HTML_CACHE.put(url, html.encode('utf-8'),
+                                        response.headers.get('ETag'))
+                        return await self._parse_in_executor(html, url, output_format), html
+                    elif response.status == 429:
+                        # Rate limited: honor Retry-After when given,
+                        # otherwise back off exponentially
+                        retry_after = response.headers.get('Retry-After')
+                        try:
+                            wait = min(float(retry_after), MAX_BACKOFF)
+                        except (TypeError, ValueError):
+                            wait = min(self.delay * (2 ** attempt), MAX_BACKOFF)
+                        print(f"Rate limited on {url}, waiting {wait:.1f}s")
+                        await asyncio.sleep(wait)
+                        continue
+                    elif 400 <= response.status < 500:
+                        # Client errors other than 429 won't change on
+                        # retry; give up immediately. A 403 is usually a
+                        # bot wall rather than a real denial, so report it
+                        # as "no response" (html=None) to leave the
+                        # browser fallback open; 404/410 and friends stay
+                        # '' so _needs_js short-circuits them.
+                        print(f"HTTP {response.status} for {url}")
+                        if response.status == 403:
+                            return None, None
+                        return None, ''
                     else:
                         print(f"HTTP {response.status} for {url}")
+                        html = ''
+                        if attempt < self.max_retries - 1:
+                            backoff = min(self.delay * (2 ** attempt), MAX_BACKOFF)
+                            await asyncio.sleep(random.uniform(self.delay, max(backoff, self.delay)))
             except Exception as e:
                 print(f"Attempt {attempt + 1} failed for {url}: {e}")
                 if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.delay * (attempt + 1))
-        
-        return None
+                    # Exponential backoff with jitter spreads retries out
+                    # instead of clustering them on a struggling host
+                    backoff = min(self.delay * (2 ** attempt), MAX_BACKOFF)
+                    await asyncio.sleep(random.uniform(self.delay, max(backoff, self.delay)))
+
+        return None, html
+
+    @staticmethod
+    def _needs_js(html: Optional[str]) -> bool:
+        """Heuristic: is a JavaScript render likely to find more content?
+
+        True for unrendered SPA shells (framework markers, script-heavy
+        pages) and for requests that never got a response; False for pages
+        that answered with ordinary server-rendered HTML that is simply
+        short or for plain error responses, where a browser would find
+        nothing new.
+        """
+        if html is None:
+            return True  # request failed outright; a browser may still work
+        if not html:
+            return False  # got a non-200 response; rendering won't help
+        if any(marker in html for marker in _SPA_MARKERS):
+            return True
+        return html.count('<script') > 3
     
-    async def _scrape_javascript(self, url: str) -> Optional[Dict[str, Any]]:
+    async def _scrape_javascript(self, url: str,
+                                 output_format: str = 'markdown') -> Optional[Dict[str, Any]]:
         """Scrape content using Playwright for JavaScript-rendered pages."""
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                
-                # Set user agent to avoid detection
-                await page.set_extra_http_headers({
-                    'User-Agent': USER_AGENT
-                })
-                
-                await page.goto(url, wait_until='networkidle', timeout=REQUEST_TIMEOUT * 1000)
-                
-                # Wait for content to load
-                await page.wait_for_timeout(2000)
-                
+            context = await self._new_context()
+            try:
+                page = await context.new_page()
+                await page.route("**/*", _route_filter)
+
+                await page.goto(url, wait_until='domcontentloaded', timeout=REQUEST_TIMEOUT * 1000)
+
+                # Wait for actual content instead of a fixed 2s sleep;
+                # if nothing matching ever appears, parse what we have
+                try:
+                    await page.wait_for_selector(CONTENT_SELECTORS[0], timeout=5000)
+                except Exception:
+                    pass
+
                 # Get the rendered HTML
                 html = await page.content()
-                await browser.close()
-                
-                return self._parse_html(html, url)
-                
+            finally:
+                await context.close()
+
+            return await self._parse_in_executor(html, url, output_format)
+
         except Exception as e:
             print(f"JavaScript scraping failed for {url}: {e}")
             return None
     
     def _parse_html(self, html: str, url: str) -> Dict[str, Any]:
         """Parse HTML content and extract structured data."""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Extract title
-        title = self._extract_title(soup)
-        
-        # Extract main content
-        content = self._extract_main_content(soup)
-        
-        # Extract author
-        author = self._extract_author(soup)
-        
-        return {
-            'title': title,
-            'content': content,
-            'author': author
-        }
-    
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        """Extract the page title."""
-        for selector in TITLE_SELECTORS:
-            title_elem = soup.select_one(selector)
-            if title_elem and title_elem.get_text().strip():
-                title = title_elem.get_text().strip()
-                if MIN_TITLE_LENGTH <= len(title) <= MAX_TITLE_LENGTH:
-                    return title
-        
-        return ""
-    
-    def _extract_main_content(self, soup: BeautifulSoup) -> str:
-        """Extract the main content from the page."""
-        for selector in CONTENT_SELECTORS:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                # Preserve HTML structure for markdown conversion
-                html_content = str(content_elem)
-                if len(content_elem.get_text().strip()) > MIN_CONTENT_LENGTH:
-                    return html_content
-        
-        # Fallback: get HTML from body
-        body = soup.find('body')
-        if body:
-            return str(body)
-        
-        return ""
-    
-    def _extract_author(self, soup: BeautifulSoup) -> str:
-        """Extract the author information."""
-        for selector in AUTHOR_SELECTORS:
-            author_elem = soup.select_one(selector)
-            if author_elem:
-                if author_elem.name == 'meta':
-                    return author_elem.get('content', '')
-                else:
-                    return author_elem.get_text().strip()
-        
-        return ""
-    
+        return _parse_page(html, url)
+
+    async def _parse_in_executor(self, html: str, url: str,
+                                 output_format: str = 'markdown') -> Dict[str, Any]:
+        """Parse off the event loop so bs4/markdownify CPU work runs on
+        other cores while aiohttp keeps issuing requests."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._pool, _parse_page, html, url,
+                                          output_format)
+
+
     def _determine_content_type(self, url: str, content: Dict[str, Any]) -> str:
         """Determine the content type based on URL and content."""
-        url_lower = url.lower()
-        title_lower = content.get('title', '').lower()
-        
-        for content_type, patterns in CONTENT_TYPE_PATTERNS.items():
-            if content_type == 'other':
-                continue
-            for pattern in patterns:
-                if pattern in url_lower or pattern in title_lower:
-                    return content_type
-        
-        return 'other'
+        # URL and title lowered once and joined with a newline (no pattern
+        # contains one, so nothing can match across the seam)
+        return _content_type_for(url.lower() + '\n' + content.get('title', '').lower())
     
-    def _clean_content(self, content: str) -> str:
-        """Clean and format the content."""
+    def _clean_content(self, content: str, is_html: bool = False) -> str:
+        """Clean and format the content.
+
+        Pass is_html=True only for raw HTML; by default the content is
+        treated as already-converted markdown, where a second markdownify
+        pass would escape legitimate characters (``*`` in code blocks,
+        ``<`` in prose) into broken ``\\*`` / ``\\<`` sequences.
+        """
         if not content:
             return ""
-        
-        # If content is already HTML, convert to markdown
-        if '<' in content and '>' in content:
+
+        if is_html:
             # Convert HTML to markdown with configured settings
             markdown_content = markdownify(
-                content, 
+                content,
                 heading_style=MARKDOWN_HEADING_STYLE,
                 bullets=MARKDOWN_BULLETS
             )
         else:
-            # If it's plain text, just clean it up
             markdown_content = content
         
-        # Clean up extra whitespace
-        markdown_content = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown_content)
-        markdown_content = re.sub(r' +', ' ', markdown_content)
-        
-        # Remove excessive line breaks
-        markdown_content = re.sub(r'\n{3,}', '\n\n', markdown_content)
+        # Collapse excess blank lines and space runs in one pass
+        markdown_content = _RE_WS_FUSED.sub(_collapse_whitespace, markdown_content)
         
         # Ensure proper markdown formatting
         markdown_content = self._improve_markdown_formatting(markdown_content)
@@ -243,47 +614,46 @@ class WebScraper:
     def _improve_markdown_formatting(self, content: str) -> str:
         """Improve markdown formatting for better readability."""
         # Ensure headers have proper spacing
-        content = re.sub(r'(\n#+\s+[^\n]+)', r'\n\n\1\n', content)
-        
+        content = _RE_HEADER.sub(r'\n\n\1\n', content)
+
         # Ensure lists have proper spacing
-        content = re.sub(r'(\n[-*+]\s+[^\n]+)', r'\n\1', content)
-        
+        content = _RE_LIST.sub(r'\n\1', content)
+
         # Ensure paragraphs have proper spacing
-        content = re.sub(r'(\n\n[^\n#\-\*\+][^\n]*\n[^\n#\-\*\+][^\n]*)', r'\1\n', content)
-        
+        content = _RE_PARA.sub(r'\1\n', content)
+
         # Clean up multiple newlines at the end
-        content = re.sub(r'\n+$', '\n\n', content)
+        content = _RE_TRAIL_NL.sub('\n\n', content)
         
         return content 
     
-    def _is_listing_page(self, url: str) -> bool:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _is_listing_page(url: str) -> bool:
         """Determine if a URL is a listing page."""
-        url_lower = url.lower()
-        
-        # Common patterns for listing pages
-        listing_patterns = [
-            '/blog',
-            '/posts',
-            '/articles',
-            '/topics',
-            '/learn',
-            '/category',
-            '/tag',
-            '/archive',
-            '/search'
-        ]
-        
-        return any(pattern in url_lower for pattern in listing_patterns)
+        return LISTING_URL_RE.search(url.lower()) is not None
     
     async def _scrape_listing_page(self, url: str, user_id: str) -> List[Dict[str, Any]]:
-        """Scrape a listing page, simulate clicks on blog cards, and extract full content for each post."""
+        """Scrape a listing page: discover the blog-card links, then scrape
+        the posts concurrently.
+
+        The old flow clicked each card, waited for navigation, parsed, and
+        navigated back — two page loads plus fixed sleeps per post, all
+        serial. The href is the only thing the click produced, so it is
+        harvested up front and the posts are fetched with a bounded fan-out
+        on the shared browser instead.
+        """
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.set_extra_http_headers({'User-Agent': USER_AGENT})
-                await page.goto(url, wait_until='networkidle', timeout=REQUEST_TIMEOUT * 1000)
-                await page.wait_for_timeout(3000)  # Wait for dynamic content
+            context = await self._new_context()
+            try:
+                page = await context.new_page()
+                await page.goto(url, wait_until='domcontentloaded', timeout=REQUEST_TIMEOUT * 1000)
+                # Wait for real content instead of networkidle plus a fixed
+                # sleep; analytics-heavy pages hold networkidle for seconds
+                try:
+                    await page.wait_for_selector(', '.join(CONTENT_SELECTORS), timeout=5000)
+                except Exception:
+                    pass
 
                 # Try to remove any overlays that might be blocking clicks
                 try:
@@ -297,210 +667,93 @@ class WebScraper:
                     """)
                 except Exception as e:
                     print(f"    Note: Could not remove overlays: {e}")
-                
-                # Function to find blog cards
-                async def find_blog_cards():
-                    all_elements = await page.query_selector_all('a, button, div, article, section')
-                    cards = []
-                    
-                    for i, element in enumerate(all_elements):
-                        try:
-                            tag_name = await element.evaluate('el => el.tagName.toLowerCase()')
-                            text_content = await element.evaluate('el => el.textContent || ""')
-                            class_name = await element.evaluate('el => el.className || ""')
-                            
-                            # Check if this looks like a blog card
-                            is_clickable = (
-                                'cursor' in class_name or 
-                                'hover' in class_name or
-                                'click' in class_name or
-                                tag_name in ['a', 'button'] or
-                                await element.evaluate('el => el.onclick !== null || el.getAttribute("role") === "button"')
-                            )
-                            
-                            # Check if it has blog-like content
-                            has_blog_content = (
-                                any(word in text_content.lower() for word in ['blog', 'post', 'article', 'read', 'more']) or
-                                any(word in class_name.lower() for word in ['card', 'post', 'article', 'blog'])
-                            )
-                            
-                            if is_clickable and has_blog_content and len(text_content.strip()) > 50:
-                                cards.append({
-                                    'element': element,
-                                    'tag': tag_name,
-                                    'text': text_content[:100],
-                                    'class': class_name,
-                                    'text_key': text_content.strip()[:50]  # For deduplication
-                                })
-                        except Exception as e:
-                            continue
-                    
-                    # Remove duplicates based on text content
-                    seen_texts = set()
-                    unique_cards = []
-                    for card in cards:
-                        if card['text_key'] not in seen_texts:
-                            seen_texts.add(card['text_key'])
-                            unique_cards.append(card)
-                    
-                    return unique_cards
-                
-                # Initial card finding
-                card_selectors = await find_blog_cards()
-                print(f"Found {len(card_selectors)} unique clickable blog cards:")
-                for i, card in enumerate(card_selectors[:5], 1):  # Show first 5
+
+                # One in-browser pass does the whole card scan: the
+                # heuristics, dedup and href resolution all run inside a
+                # single evaluate call
+                cards = await page.evaluate(_FIND_BLOG_CARDS_JS)
+                print(f"Found {len(cards)} unique clickable blog cards:")
+                for i, card in enumerate(cards[:5], 1):  # Show first 5
                     print(f"  {i}. {card['tag'].upper()} - {card['text'][:50]}...")
-                if len(card_selectors) > 5:
-                    print(f"  ... and {len(card_selectors) - 5} more")
-                
-                print(f"Processing {len(card_selectors)} elements...")
-                items = []
-                processed_urls = set()  # Track URLs we've already processed
-                processed_cards = set()  # Track which cards we've already clicked
-                
-                i = 0
-                while i < len(card_selectors):
-                    card = card_selectors[i]
-                    
-                    # Skip if we've already processed this card
-                    card_key = card['text_key']
-                    if card_key in processed_cards:
-                        print(f"  ⏭ Skipping card {i+1} (already processed)")
-                        i += 1
-                        continue
-                    
-                    print(f"  Attempting to click card {i+1}...")
-                    
-                    try:
-                        # Get current URL before click
-                        prev_url = page.url
-                        
-                        # Try to click with multiple strategies
-                        click_success = False
-                        for attempt in range(3):
-                            try:
-                                # Strategy 1: Direct click
-                                await card['element'].click(timeout=5000)
-                                click_success = True
-                                break
-                            except Exception as e1:
-                                try:
-                                    # Strategy 2: Click with force
-                                    await card['element'].click(force=True, timeout=5000)
-                                    click_success = True
-                                    break
-                                except Exception as e2:
-                                    try:
-                                        # Strategy 3: Use JavaScript click
-                                        await page.evaluate('el => el.click()', card['element'])
-                                        click_success = True
-                                        break
-                                    except Exception as e3:
-                                        if attempt == 2:  # Last attempt
-                                            print(f"    ✗ All click strategies failed: {e1}, {e2}, {e3}")
-                                        else:
-                                            await page.wait_for_timeout(1000)
-                        
-                        if not click_success:
-                            print(f"    ✗ Could not click card {i+1}")
-                            processed_cards.add(card_key)  # Mark as processed to avoid retrying
-                            i += 1  # Move to next card
-                            continue
-                        
-                        # Wait for navigation
-                        await page.wait_for_timeout(3000)
-                        new_url = page.url
-                        
-                        print(f"    ✓ Click successful")
-                        print(f"    URL before: {prev_url}")
-                        print(f"    URL after: {new_url}")
-                        
-                        # Only extract content if we actually navigated to a different page
-                        if new_url != prev_url and '/blog/' in new_url:
-                            # Check if we've already processed this URL
-                            if new_url in processed_urls:
-                                print(f"    ⚠ Already processed this URL, skipping...")
-                                processed_cards.add(card_key)  # Mark card as processed
-                                # Navigate back and move to next card
-                                await page.goto(url, wait_until='networkidle', timeout=REQUEST_TIMEOUT * 1000)
-                                await page.wait_for_timeout(2000)
-                                card_selectors = await find_blog_cards()
-                                i += 1  # Move to next card
-                                continue
-                            
-                            # Extract the full content and title
-                            html = await page.content()
-                            data = self._parse_html(html, new_url)
-                            if data and data.get('content'):
-                                print(f"    ✓ Content extracted: {len(data.get('content', ''))} chars")
-                                # Clean and format the content
-                                data['content'] = self._clean_content(data['content'])
-                                data['source_url'] = new_url
-                                data['user_id'] = user_id
-                                data['content_type'] = 'blog'
-                                data['author'] = data.get('author', '')
-                                items.append(data)
-                                processed_urls.add(new_url)  # Mark as processed
-                                processed_cards.add(card_key)  # Mark card as processed
-                            else:
-                                print(f"    ✗ No content found after click")
-                                processed_cards.add(card_key)  # Mark card as processed
-                            
-                            # Navigate back to the listing page
-                            print(f"    ↶ Navigating back to listing page...")
-                            await page.goto(url, wait_until='networkidle', timeout=REQUEST_TIMEOUT * 1000)
-                            await page.wait_for_timeout(2000)
-                            
-                            # Re-find the elements since we're back on the listing page
-                            card_selectors = await find_blog_cards()
-                            print(f"    ✓ Back on listing page, {len(card_selectors)} elements available")
-                            # Don't reset index - continue from where we left off
-                            i += 1
-                        else:
-                            print(f"    ⚠ No navigation detected or not a blog post URL")
-                            processed_cards.add(card_key)  # Mark card as processed
-                            i += 1  # Move to next card
-                        
-                    except Exception as e:
-                        print(f"    ✗ Error clicking card {i+1}: {e}")
-                        processed_cards.add(card_key)  # Mark card as processed
-                        # If there was an error, try to re-find elements in case we're on a different page
-                        try:
-                            card_selectors = await find_blog_cards()
-                            print(f"    ↻ Re-finding elements after error, {len(card_selectors)} available")
-                            # Don't reset index - continue from where we left off
-                            i += 1
-                        except Exception as refind_error:
-                            print(f"    ✗ Could not re-find elements: {refind_error}")
-                            i += 1  # Move to next card
+                if len(cards) > 5:
+                    print(f"  ... and {len(cards) - 5} more")
+
+                # A card that navigates only via script has no href and is
+                # skipped
+                hrefs = []
+                seen_urls = set()
+                for card in cards:
+                    href = card.get('href')
+                    if not href:
                         continue
-                await browser.close()
-                return items
+                    href = canonicalize_url(urljoin(url, href))
+                    if '/blog/' in href and href != url and href not in seen_urls:
+                        seen_urls.add(href)
+                        hrefs.append(href)
+            finally:
+                await context.close()
+
+            print(f"Processing {len(hrefs)} blog post links...")
+            if not hrefs:
+                return []
+
+            # Bounded fan-out; each post opens its own context on the
+            # shared browser, so posts render in parallel
+            sem = asyncio.Semaphore(LISTING_CONCURRENCY)
+
+            async def scrape_one(post_url):
+                async with sem:
+                    return await self._scrape_full_blog_post(post_url, user_id)
+
+            results = await asyncio.gather(*(scrape_one(u) for u in hrefs),
+                                           return_exceptions=True)
+            return [r for r in results if r and not isinstance(r, Exception)]
         except Exception as e:
             print(f"Error scraping listing page {url}: {e}")
             return []
 
+    def _finalize_post(self, data: Optional[dict], url: str, user_id: str) -> Optional[dict]:
+        """Shared post-processing for blog posts from either fetch path."""
+        if not data or not data.get('content'):
+            return None
+        # Clean and format the content
+        data['content'] = self._clean_content(data['content'])
+        data['source_url'] = url
+        data['user_id'] = user_id
+        data['content_type'] = 'blog'
+        data['author'] = data.get('author', '')
+        return data
+
     async def _scrape_full_blog_post(self, url: str, user_id: str) -> dict:
-        """Visit a blog post URL and extract the full content and title."""
+        """Visit a blog post URL and extract the full content and title.
+
+        Most blog posts are server-rendered, so a plain GET (~100ms) is
+        tried before paying for a browser render (seconds); Playwright
+        only runs when the HTML yields little or no content.
+        """
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.set_extra_http_headers({'User-Agent': USER_AGENT})
-                await page.goto(url, wait_until='networkidle', timeout=REQUEST_TIMEOUT * 1000)
-                await page.wait_for_timeout(2000)
+            await self._respect_host_delay(url)
+            data, _ = await self._scrape_html(url)
+            if data and len(data.get('content', '')) >= MIN_CONTENT_LENGTH * 2:
+                return self._finalize_post(data, url, user_id)
+        except Exception as e:
+            print(f"HTTP fetch failed for blog post {url}: {e}")
+
+        try:
+            context = await self._new_context()
+            try:
+                page = await context.new_page()
+                await page.route("**/*", _route_filter)
+                await page.goto(url, wait_until='domcontentloaded', timeout=REQUEST_TIMEOUT * 1000)
+                try:
+                    await page.wait_for_selector(CONTENT_SELECTORS[0], timeout=5000)
+                except Exception:
+                    pass
                 html = await page.content()
-                await browser.close()
-                data = self._parse_html(html, url)
-                if not data or not data.get('content'):
-                    return None
-                # Clean and format the content
-                data['content'] = self._clean_content(data['content'])
-                data['source_url'] = url
-                data['user_id'] = user_id
-                data['content_type'] = 'blog'
-                data['author'] = data.get('author', '')
-                return data
+            finally:
+                await context.close()
+            data = await self._parse_in_executor(html, url)
+            return self._finalize_post(data, url, user_id)
         except Exception as e:
             print(f"Error scraping blog post {url}: {e}")
             return None 
\ No newline at end of file
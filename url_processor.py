@@ -4,12 +4,121 @@ URL processor that handles pagination and extracts individual page URLs.
 
 import asyncio
 import aiohttp
-from bs4 import BeautifulSoup
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
 from playwright.async_api import async_playwright
-from urllib.parse import urljoin, urlparse, parse_qs, urlencode
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, urlencode
 from typing import List, Set
+from functools import lru_cache
+import random
 import re
 from config import *
+from http_client import create_session
+
+logger = logging.getLogger(__name__)
+
+# Query params that only carry attribution noise; stripping them (and
+# fragments) keeps one canonical spelling per page
+_TRACKING_PARAM_RE = re.compile(r'^(?:utm_|fbclid$|gclid$|ref$)', re.I)
+
+# Link extraction only ever looks at anchors; parse_only skips building
+# tree nodes for everything else during parsing
+_ANCHOR_STRAINER = SoupStrainer('a', href=True)
+
+
+@lru_cache(maxsize=1024)
+def _netloc(url: str) -> str:
+    """Host of a URL, lowercased; cached because validation compares the
+    same base URL against every candidate href on a page."""
+    return urlparse(url).netloc.lower()
+
+
+def _is_valid_content_url(url: str, base_url: str) -> bool:
+    """Check if a URL is a valid content URL.
+
+    Module-level (and picklable) so parsing can run in a worker process.
+    """
+    # Absolute http(s) URLs are dissected with string splits; a full
+    # urlparse per href is measurable over thousands of links
+    if url.startswith(('http://', 'https://')):
+        parts = url.split('/', 3)
+        netloc = parts[2].split('?', 1)[0].split('#', 1)[0].lower()
+        path = '/' + parts[3].split('?', 1)[0].split('#', 1)[0] if len(parts) > 3 else ''
+    else:
+        parsed_url = urlparse(url)
+        netloc = parsed_url.netloc.lower()
+        path = parsed_url.path
+
+    # Must be same domain; the base host comes from the cache instead
+    # of re-parsing the same base URL for every href
+    if netloc != _netloc(base_url):
+        return False
+
+    # Skip common non-content URLs
+    if SKIP_URL_RE.search(url.lower()):
+        return False
+
+    # Must have some path (not just domain)
+    if not path or path == '/':
+        return False
+
+    return True
+
+
+def _parse_urls_from_html(html: str, base_url: str) -> Set[str]:
+    """Parse URLs from HTML content."""
+    soup = BeautifulSoup(html, 'lxml', parse_only=_ANCHOR_STRAINER)
+    urls = set()
+
+    # Find all links
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+
+        # Cheap rejects before paying for urljoin/urlparse; these
+        # schemes and fragments can never be content URLs
+        if href.startswith(('#', 'mailto:', 'javascript:', 'tel:')):
+            continue
+
+        # Convert relative URLs to absolute and canonicalize so
+        # fragment/tracking-param variants dedupe to one fetch
+        absolute_url = canonicalize_url(urljoin(base_url, href))
+
+        # Filter URLs based on domain and content
+        if _is_valid_content_url(absolute_url, base_url):
+            urls.add(absolute_url)
+
+    return urls
+
+
+# Pages smaller than this parse faster inline than a pickle round-trip
+# to a worker process costs
+_PARSE_IN_PROCESS_BYTES = 256 * 1024
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings dedupe to one fetch.
+
+    Lowercases scheme and host, drops default ports, strips the fragment
+    and tracking params, sorts the remaining query, and trims a single
+    trailing slash off non-root paths.
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if ((scheme == 'http' and netloc.endswith(':80'))
+            or (scheme == 'https' and netloc.endswith(':443'))):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = parsed.path
+    if len(path) > 1 and path.endswith('/'):
+        path = path[:-1]
+    query = ''
+    if parsed.query:
+        kept = sorted(p for p in parsed.query.split('&')
+                      if p and not _TRACKING_PARAM_RE.match(p.split('=', 1)[0]))
+        query = '&'.join(kept)
+    return urlunparse((scheme, netloc, path, parsed.params, query, ''))
 
 
 class URLProcessor:
@@ -18,16 +127,45 @@ class URLProcessor:
     def __init__(self, max_pages: int = MAX_PAGES):
         self.max_pages = max_pages
         self.session = None
+        # Shared Chromium instance; launching costs seconds, a context
+        # per call costs milliseconds
+        self._pw = None
+        self._browser = None
+        # Pagination templates that actually answered for a base URL, and
+        # probe results already paid for; both keep repeat pages from
+        # re-probing patterns the site never supported
+        self._working_patterns = {}
+        self._url_exists_cache = {}
+        # Worker processes for parsing big listing pages, created on
+        # first use
+        self._pool = None
     
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = aiohttp.ClientSession()
+        self.session = create_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
         if self.session:
             await self.session.close()
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    async def _get_browser(self):
+        """Return the shared Chromium instance, launching it on first use."""
+        if self._browser is None:
+            if self._pw is None:
+                self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch(headless=True)
+        return self._browser
     
     async def process_url(self, url: str) -> List[str]:
         """Process a URL and return a list of individual page URLs."""
@@ -42,42 +180,25 @@ class URLProcessor:
     
     def _is_listing_page(self, url: str) -> bool:
         """Determine if a URL is a listing page."""
-        url_lower = url.lower()
-        
-        # Common patterns for listing pages
-        listing_patterns = [
-            '/blog',
-            '/posts',
-            '/articles',
-            '/topics',
-            '/learn',
-            '/category',
-            '/tag',
-            '/archive',
-            '/search'
-        ]
-        
-        return any(pattern in url_lower for pattern in listing_patterns)
+        return LISTING_URL_RE.search(url.lower()) is not None
     
     async def _extract_from_listing_page(self, url: str) -> List[str]:
         """Extract individual page URLs from a listing page."""
         urls = set()
         
         # Try HTML first
-        print(f"Debug: Trying HTML extraction for {url}")
+        logger.debug("Trying HTML extraction for %s", url)
         html_urls = await self._extract_urls_html(url)
-        print(f"Debug: HTML extraction found {len(html_urls)} URLs")
+        logger.debug("HTML extraction found %d URLs", len(html_urls))
         urls.update(html_urls)
         
-        # Only try JavaScript if HTML extraction found very few URLs (less than 5)
-        # This avoids unnecessary JavaScript extraction when HTML already works
-        if len(html_urls) < 5:
-            print(f"Debug: HTML extraction found few URLs, trying JavaScript extraction for {url}")
+        # Fall back to the browser only when HTML found nothing at all; a
+        # sparse but non-empty result is not worth a multi-second render
+        if not html_urls:
+            logger.debug("HTML extraction found nothing, trying JavaScript extraction for %s", url)
             js_urls = await self._extract_urls_javascript(url)
-            print(f"Debug: JavaScript extraction found {len(js_urls)} URLs")
+            logger.debug("JavaScript extraction found %d URLs", len(js_urls))
             urls.update(js_urls)
-        else:
-            print(f"Debug: HTML extraction found sufficient URLs ({len(html_urls)}), skipping JavaScript extraction")
         
         # Handle pagination
         paginated_urls = await self._handle_pagination(url, urls)
@@ -88,138 +209,90 @@ class URLProcessor:
     async def _extract_urls_html(self, url: str) -> Set[str]:
         """Extract URLs using simple HTTP requests."""
         if not self.session:
-            self.session = aiohttp.ClientSession()
-        
-        try:
-            async with self.session.get(url, timeout=REQUEST_TIMEOUT) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    return self._parse_urls_from_html(html, url)
-        except Exception as e:
-            print(f"Error extracting URLs from {url}: {e}")
-        
+            self.session = create_session()
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                async with self.session.get(url, timeout=REQUEST_TIMEOUT) as response:
+                    if response.status == 200:
+                        # Explicit decode skips the charset detection pass
+                        # that response.text() runs on undeclared encodings
+                        body = await response.read()
+                        html = body.decode(response.charset or 'utf-8', 'replace')
+                        if len(body) < _PARSE_IN_PROCESS_BYTES:
+                            return _parse_urls_from_html(html, url)
+                        # Big pages parse on another core so the event
+                        # loop keeps fetching meanwhile
+                        if self._pool is None:
+                            self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+                        loop = asyncio.get_event_loop()
+                        return await loop.run_in_executor(
+                            self._pool, _parse_urls_from_html, html, url)
+                    if response.status == 429 or response.status >= 500:
+                        # Honor Retry-After when the origin pushes back,
+                        # otherwise back off exponentially with jitter
+                        retry_after = response.headers.get('Retry-After')
+                        try:
+                            wait = min(float(retry_after), MAX_BACKOFF)
+                        except (TypeError, ValueError):
+                            wait = min(SCRAPING_DELAY * (2 ** attempt), MAX_BACKOFF)
+                        await asyncio.sleep(wait + random.uniform(0, 0.5))
+                        continue
+                    # Other client errors won't change on retry
+                    return set()
+            except Exception as e:
+                logger.warning("Error extracting URLs from %s: %s", url, e)
+                if attempt < MAX_RETRIES - 1:
+                    backoff = min(SCRAPING_DELAY * (2 ** attempt), MAX_BACKOFF)
+                    await asyncio.sleep(backoff * (1 + random.random()))
+
         return set()
     
     async def _extract_urls_javascript(self, url: str) -> Set[str]:
         """Extract URLs using Playwright for JavaScript-rendered pages."""
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.set_extra_http_headers({'User-Agent': USER_AGENT})
+            browser = await self._get_browser()
+            context = await browser.new_context(user_agent=USER_AGENT)
+            try:
+                page = await context.new_page()
                 await page.goto(url, wait_until='networkidle', timeout=REQUEST_TIMEOUT * 1000)
-                await page.wait_for_selector('a[href]')  # Wait for links to load
-                
-                # Wait a bit longer for dynamic content
-                await page.wait_for_timeout(3000)
+                # Anchors appearing is the readiness signal; no fixed sleep
+                try:
+                    await page.wait_for_selector('a[href]', timeout=5000)
+                except Exception:
+                    pass
 
-                # Debug: Check for different types of clickable elements
-                print(f"Debug: Checking for blog post links...")
-                
-                # Look for elements that might be blog post links
-                blog_links = await page.eval_on_selector_all(
-                    'a, [role="link"], [class*="post"], [class*="blog"], [class*="article"]',
-                    '''
-                    elements => elements.map(el => ({
-                        tag: el.tagName,
-                        href: el.href || null,
-                        text: el.textContent?.trim() || '',
-                        className: el.className || '',
-                        role: el.getAttribute('role') || null
-                    }))
-                    '''
-                )
-                
-                print(f"Debug: Found {len(blog_links)} potential link elements:")
-                for i, link in enumerate(blog_links[:10], 1):
-                    print(f"  {i}. {link['tag']} - href: {link['href']} - text: {link['text'][:50]}... - class: {link['className'][:30]}...")
-                
-                # Also check for any elements with blog-related text
-                blog_text_elements = await page.eval_on_selector_all(
-                    '*',
-                    '''
-                    elements => elements
-                        .filter(el => {
-                            const text = el.textContent?.trim() || '';
-                            return text.length > 10 && text.length < 200 && 
-                                   (text.includes('Read more') || text.includes('blog') || text.includes('post'));
-                        })
-                        .map(el => ({
-                            tag: el.tagName,
-                            text: el.textContent?.trim() || '',
-                            className: el.className || '',
-                            parentTag: el.parentElement?.tagName || null
-                        }))
-                    '''
-                )
-                
-                print(f"Debug: Found {len(blog_text_elements)} elements with blog-related text:")
-                for i, elem in enumerate(blog_text_elements[:5], 1):
-                    print(f"  {i}. {elem['tag']} - text: {elem['text'][:50]}... - class: {elem['className'][:30]}...")
-                
                 # Extract all hrefs from anchor tags
                 hrefs = await page.eval_on_selector_all(
                     'a[href]',
                     'elements => elements.map(el => el.href)'
                 )
-                await browser.close()
 
                 # Debug: Show all hrefs found
-                print(f"Debug: Found {len(hrefs)} total hrefs from {url}")
-                for i, href in enumerate(hrefs[:10], 1):  # Show first 10
-                    print(f"  {i}. {href}")
-                if len(hrefs) > 10:
-                    print(f"  ... and {len(hrefs) - 10} more")
+                logger.debug("Found %d total hrefs from %s", len(hrefs), url)
 
                 # Filter and normalize URLs as needed
                 valid_urls = set()
                 for href in hrefs:
+                    href = canonicalize_url(href)
                     if self._is_valid_content_url(href, url):
                         valid_urls.add(href)
                 
-                print(f"Debug: After filtering, {len(valid_urls)} valid URLs remain")
+                logger.debug("After filtering, %d valid URLs remain", len(valid_urls))
                 return valid_urls
+            finally:
+                await context.close()
         except Exception as e:
-            print(f"JavaScript URL extraction failed for {url}: {e}")
+            logger.error("JavaScript URL extraction failed for %s: %s", url, e)
             return set()
     
     def _parse_urls_from_html(self, html: str, base_url: str) -> Set[str]:
         """Parse URLs from HTML content."""
-        soup = BeautifulSoup(html, 'html.parser')
-        urls = set()
-        
-        # Find all links
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            
-            # Convert relative URLs to absolute
-            absolute_url = urljoin(base_url, href)
-            
-            # Filter URLs based on domain and content
-            if self._is_valid_content_url(absolute_url, base_url):
-                urls.add(absolute_url)
-        
-        return urls
-    
+        return _parse_urls_from_html(html, base_url)
+
     def _is_valid_content_url(self, url: str, base_url: str) -> bool:
         """Check if a URL is a valid content URL."""
-        parsed_url = urlparse(url)
-        parsed_base = urlparse(base_url)
-        
-        # Must be same domain
-        if parsed_url.netloc != parsed_base.netloc:
-            return False
-        
-        # Skip common non-content URLs
-        url_lower = url.lower()
-        if any(pattern in url_lower for pattern in SKIP_URL_PATTERNS):
-            return False
-        
-        # Must have some path (not just domain)
-        if not parsed_url.path or parsed_url.path == '/':
-            return False
-        
-        return True
+        return _is_valid_content_url(url, base_url)
     
     async def _handle_pagination(self, base_url: str, existing_urls: Set[str]) -> Set[str]:
         """Handle pagination to find more URLs."""
@@ -233,9 +306,11 @@ class URLProcessor:
             if not pagination_urls:
                 break
             
-            # Extract URLs from this page
-            for pagination_url in pagination_urls:
-                page_urls = await self._extract_urls_html(pagination_url)
+            # Extract URLs from the discovered pages concurrently
+            page_url_sets = await asyncio.gather(
+                *(self._extract_urls_html(p) for p in pagination_urls)
+            )
+            for page_urls in page_url_sets:
                 urls.update(page_urls)
             
             # If we didn't find any new URLs, stop
@@ -246,31 +321,51 @@ class URLProcessor:
         
         return urls
     
+    _PAGINATION_TEMPLATES = (
+        "{base}?page={page}",
+        "{base}?p={page}",
+        "{base}/page/{page}",
+        "{base}/p/{page}",
+        "{base}?pg={page}",
+        "{base}?pagination={page}"
+    )
+
     async def _try_pagination_patterns(self, base_url: str, page: int) -> List[str]:
-        """Try different pagination URL patterns."""
-        patterns = [
-            f"{base_url}?page={page}",
-            f"{base_url}?p={page}",
-            f"{base_url}/page/{page}",
-            f"{base_url}/p/{page}",
-            f"{base_url}?pg={page}",
-            f"{base_url}?pagination={page}"
-        ]
-        
-        valid_urls = []
-        for pattern in patterns:
-            if await self._url_exists(pattern):
-                valid_urls.append(pattern)
-        
-        return valid_urls
+        """Try different pagination URL patterns.
+
+        Page 1 probes every template; the ones that answered are
+        remembered per base URL so later pages probe only those.
+        """
+        templates = self._working_patterns.get(base_url)
+        first_probe = templates is None
+        if first_probe:
+            templates = self._PAGINATION_TEMPLATES
+        candidates = [t.format(base=base_url, page=page) for t in templates]
+
+        # The probes are independent; firing them together costs one RTT
+        # instead of six
+        results = await asyncio.gather(*(self._url_exists(c) for c in candidates))
+        if first_probe:
+            self._working_patterns[base_url] = tuple(
+                t for t, ok in zip(templates, results) if ok)
+        return [candidate for candidate, ok in zip(candidates, results) if ok]
     
     async def _url_exists(self, url: str) -> bool:
         """Check if a URL exists."""
+        cached = self._url_exists_cache.get(url)
+        if cached is not None:
+            return cached
+
         if not self.session:
-            self.session = aiohttp.ClientSession()
-        
+            self.session = create_session()
+
         try:
-            async with self.session.head(url, timeout=10) as response:
-                return response.status == 200
+            # Redirect targets still exist; don't follow the chain, the
+            # status alone answers the question
+            async with self.session.head(url, timeout=10,
+                                         allow_redirects=False) as response:
+                exists = 200 <= response.status < 400
         except:
-            return False 
\ No newline at end of file
+            exists = False
+        self._url_exists_cache[url] = exists
+        return exists 
\ No newline at end of file